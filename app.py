@@ -1,6 +1,88 @@
+import time
+
 import streamlit as st
 import pandas as pd
 from backend import database
+from backend import screening
+
+SEARCH_PAGE_SIZE = 100
+PAGE_SIZE = 100
+
+ENTITY_COLUMNS = ['Name', 'Type', 'Source', 'Date', 'Article Title', 'URL', 'Published', 'Row']
+ARTICLE_COLUMNS = ['ID', 'Source', 'Title', 'URL', 'Date', 'Content', 'Created At', 'Published']
+
+# Metric windows (label -> seconds); trend charts always cover 30 days
+WINDOWS = {'24h': 86400, '7d': 7 * 86400, '30d': 30 * 86400}
+
+@st.cache_resource
+def init_database():
+    # Once per server process, not on every rerun
+    database.init_db()
+
+# Every loader takes the ingest version as its first argument, so cached
+# results are reused across reruns until the updater stores or deletes rows.
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_entities(version, before=None, limit=PAGE_SIZE):
+    rows = database.get_recent_entities(limit=limit, before=before)
+    return pd.DataFrame([tuple(row) for row in rows], columns=ENTITY_COLUMNS)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_articles(version, before=None, limit=PAGE_SIZE):
+    rows = database.get_recent_articles(limit=limit, before=before)
+    return pd.DataFrame([tuple(row) for row in rows], columns=ARTICLE_COLUMNS)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_search(version, query, page):
+    rows = database.search(query, limit=SEARCH_PAGE_SIZE, offset=(page - 1) * SEARCH_PAGE_SIZE)
+    return pd.DataFrame([tuple(row)[:6] for row in rows], columns=ENTITY_COLUMNS[:6])
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_watchlist(version, before=None, limit=PAGE_SIZE):
+    df = pd.DataFrame(
+        [tuple(row) for row in database.get_watchlist(limit=limit, before=before)],
+        columns=['ID', 'Name', 'Type', 'Mentions', 'First Seen', 'Last Seen']
+    )
+    # Raw epoch kept for the page cursor
+    df['Seen'] = df['Last Seen']
+    for col in ('First Seen', 'Last Seen'):
+        df[col] = pd.to_datetime(df[col], unit='s')
+    return df
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def load_metrics(version, window, hour):
+    # `hour` rolls the window forward even when no new data arrives
+    return database.get_metrics(since=hour * 3600 - WINDOWS[window])
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_trends(version, day):
+    since = day * 86400 - WINDOWS['30d']
+    mentions = pd.DataFrame([tuple(row) for row in database.get_daily_mentions(since)],
+                            columns=['Day', 'Risk Level', 'Mentions'])
+    articles = pd.DataFrame([tuple(row) for row in database.get_daily_articles(since)],
+                            columns=['Day', 'Source', 'Articles'])
+    return (mentions.pivot_table(index='Day', columns='Risk Level', values='Mentions', fill_value=0),
+            articles.pivot_table(index='Day', columns='Source', values='Articles', fill_value=0))
+
+def page_cursors(key):
+    # Stack of keyset cursors, one per page visited; [None] is the newest page
+    return st.session_state.setdefault(key, [None])
+
+def keyset_pager(key, df, id_column, cursor_column='Published'):
+    """
+    Newer/older buttons under a keyset-paginated table. The next cursor is
+    the (cursor_column, id) of the page's last row, published_at by default.
+    """
+    cursors = page_cursors(key)
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        st.button("◀ Newer", key=f'{key}_prev', disabled=len(cursors) == 1, on_click=cursors.pop)
+    with col_page:
+        st.caption(f"Page {len(cursors)}")
+    with col_next:
+        last = (int(df[cursor_column].iloc[-1]), int(df[id_column].iloc[-1])) if len(df) else None
+        st.button("Older ▶", key=f'{key}_next', disabled=len(df) < PAGE_SIZE,
+                  on_click=cursors.append, args=(last,))
+
 # Sidebar
 with st.sidebar:
     st.image("https://cdn-icons-png.flaticon.com/512/2040/2040504.png", width=100) # Placeholder icon
@@ -16,54 +98,88 @@ with st.sidebar:
 st.title("🕵️ Real-time AML Emerging Watchlist")
 st.markdown("Monitoring global press releases for emerging financial crime entities and red flags.")
 
-# Initialize DB on first load (safe to call multiple times)
-database.init_db()
+init_database()
+data_version = database.get_ingest_version()
 
-# Fetch Data (Increased limit to show historical November data)
-recent_entities = database.get_recent_entities(limit=500)
-recent_articles = database.get_recent_articles(limit=200)
+recent_entities = load_entities(data_version, page_cursors('entity_pages')[-1])
+recent_articles = load_articles(data_version, page_cursors('article_pages')[-1])
 
-# Metrics
-col1, col2 = st.columns(2)
+# Metrics (read from the rollup tables; counted by publication date)
+now_hour = int(time.time()) // 3600
+window = st.radio("Window", list(WINDOWS), horizontal=True, label_visibility="collapsed")
+metrics = load_metrics(data_version, window, now_hour)
+col1, col2, col3, col4 = st.columns(4)
 with col1:
-    st.metric("Entities Detected (24h)", len(recent_entities))
+    st.metric(f"Entity Mentions ({window})", metrics['mentions'])
 with col2:
-    st.metric("Articles Scanned", len(recent_articles))
+    st.metric(f"New Entities ({window})", metrics['new_entities'])
+with col3:
+    st.metric(f"High Risk Mentions ({window})", metrics['high_risk'])
+with col4:
+    st.metric(f"Articles Published ({window})", metrics['articles'])
+
+with st.expander("📈 30-day trends"):
+    mention_trend, article_trend = load_trends(data_version, now_hour // 24)
+    if mention_trend.empty and article_trend.empty:
+        st.caption("Nothing published in the last 30 days.")
+    else:
+        st.markdown("**Entity mentions per day by risk level**")
+        st.bar_chart(mention_trend)
+        st.markdown("**Articles per day by source**")
+        st.bar_chart(article_trend)
 
 st.markdown("---")
 
 # Tabs
-tab1, tab2 = st.tabs(["📋 Emerging Entities", "📰 News Feed"])
+tab1, tab2, tab3 = st.tabs(["📋 Emerging Entities", "📰 News Feed", "🔎 Screen a Name"])
 
 with tab1:
     st.subheader("Extracted Entities & Organizations")
-    if recent_entities:
-        df_entities = pd.DataFrame(recent_entities, columns=['Name', 'Type', 'Source', 'Date', 'Article Title', 'URL'])
-        
-        # Search/Filter
-        search = st.text_input("Search Entities", placeholder="Filter by name...")
+    if len(recent_entities) or len(page_cursors('entity_pages')) > 1:
+        df_entities = recent_entities[ENTITY_COLUMNS[:6]]
+
+        # Search/Filter (full-text index over the whole history, not just the rows above)
+        search = st.text_input("Search Entities", placeholder="Search names, titles and article text...")
         if search:
-            df_entities = df_entities[df_entities['Name'].str.contains(search, case=False) | df_entities['Article Title'].str.contains(search, case=False)]
+            page = st.number_input("Results page", min_value=1, value=1, step=1)
+            df_entities = load_search(data_version, search, page)
+            st.caption(f"{len(df_entities)} matches on page {page}, best first.")
 
-        st.dataframe(
-            df_entities,
-            column_config={
-                "URL": st.column_config.LinkColumn("Source Link"),
-                "Date": st.column_config.DatetimeColumn("Date Detected", format="D MMM YYYY, HH:mm")
-            },
-            use_container_width=True,
-            hide_index=True
-        )
+        view = st.radio("View", ["Mentions", "Distinct entities"], horizontal=True)
+        if view == "Distinct entities" and not search:
+            # One row per actor, however many articles and spellings it appears under
+            df_watchlist = load_watchlist(data_version, page_cursors('watchlist_pages')[-1])
+            st.dataframe(
+                df_watchlist.drop(columns=['ID', 'Seen']),
+                column_config={
+                    "First Seen": st.column_config.DatetimeColumn("First Seen", format="D MMM YYYY"),
+                    "Last Seen": st.column_config.DatetimeColumn("Last Seen", format="D MMM YYYY"),
+                },
+                use_container_width=True,
+                hide_index=True
+            )
+            keyset_pager('watchlist_pages', df_watchlist, 'ID', cursor_column='Seen')
+        else:
+            st.dataframe(
+                df_entities,
+                column_config={
+                    "URL": st.column_config.LinkColumn("Source Link"),
+                    "Date": st.column_config.DatetimeColumn("Date Detected", format="D MMM YYYY, HH:mm")
+                },
+                use_container_width=True,
+                hide_index=True
+            )
+            if not search:
+                keyset_pager('entity_pages', recent_entities, 'Row')
     else:
         st.info("No entities detected yet. Click 'Refresh Data Now' in the sidebar to start.")
 
 with tab2:
     st.subheader("Recent Press Releases")
-    if recent_articles:
-        df_articles = pd.DataFrame(recent_articles, columns=['ID', 'Source', 'Title', 'URL', 'Date', 'Content', 'Created At'])
+    if len(recent_articles) or len(page_cursors('article_pages')) > 1:
         # Simplified view
-        df_display = df_articles[['Date', 'Source', 'Title', 'URL']]
-        
+        df_display = recent_articles[['Date', 'Source', 'Title', 'URL']]
+
         st.dataframe(
             df_display,
             column_config={
@@ -73,5 +189,38 @@ with tab2:
             use_container_width=True,
             hide_index=True
         )
+        keyset_pager('article_pages', recent_articles, 'ID')
     else:
         st.info("No articles found.")
+
+@st.cache_resource(max_entries=1)
+def load_screening_index(version):
+    # Rebuilt only after new data lands; max_entries drops the old copy
+    return screening.ScreeningIndex.from_db()
+
+with tab3:
+    st.subheader("Fuzzy Name Screening")
+    st.markdown("Matches ignore case, accents, punctuation, word order and corporate suffixes (Inc., LLC, S.A., ...).")
+    col_name, col_score = st.columns([3, 1])
+    with col_name:
+        customer = st.text_input("Customer / counterparty name", placeholder="e.g. Petrov, Ivan")
+    with col_score:
+        min_score = st.slider("Min. score", 0.5, 1.0, 0.8, 0.01)
+    if customer:
+        hits = screening.attach_articles(load_screening_index(data_version).query(customer, k=20, min_score=min_score))
+        if hits:
+            rows = [{
+                'Watchlist Name': hit['name'],
+                'Score': hit['score'],
+                'Risk': ', '.join(hit['types']),
+                'Latest Source': hit['articles'][0]['title'] if hit['articles'] else '',
+                'URL': hit['articles'][0]['url'] if hit['articles'] else '',
+            } for hit in hits]
+            st.dataframe(
+                pd.DataFrame(rows),
+                column_config={"URL": st.column_config.LinkColumn("Source Link")},
+                use_container_width=True,
+                hide_index=True
+            )
+        else:
+            st.success("No watchlist match above the threshold.")
@@ -1,6 +1,12 @@
 import streamlit as st
 import pandas as pd
+import json
 import os
+import time
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
 
 st.set_page_config(
     page_title="Real-time AML Agent (DEMO)",
@@ -8,14 +14,79 @@ st.set_page_config(
     layout="wide"
 )
 
-# Load Static Data (No Database Connection)
+# Static snapshot written by export_for_demo.py (No Database Connection)
+SNAPSHOT_DIR = 'demo_snapshot'
+
+ENTITY_COLUMNS = ['name', 'type', 'source', 'date', 'title', 'url', 'published_at']
+ARTICLE_COLUMNS = ['id', 'source', 'title', 'url', 'date', 'published_at']
+
+def load_manifest():
+    try:
+        with open(os.path.join(SNAPSHOT_DIR, 'manifest.json'), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def read_parts(manifest, kind, columns):
+    # Only the requested columns are decoded; the files are memory-mapped
+    parts = [pq.read_table(os.path.join(SNAPSHOT_DIR, name), columns=columns, memory_map=True)
+             for name in manifest['parts'][kind]]
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    return pa.concat_tables(parts).to_pandas()
+
+# The manifest's export time is part of every cache key, so a new snapshot is picked up
 @st.cache_data
-def load_data():
-    if not os.path.exists('demo_entities.csv'):
-        return pd.DataFrame(), pd.DataFrame()
-    return pd.read_csv('demo_entities.csv'), pd.read_csv('demo_articles.csv')
+def load_data(exported_at):
+    manifest = load_manifest()
+    if manifest is None:
+        return pd.DataFrame(columns=ENTITY_COLUMNS), pd.DataFrame(columns=ARTICLE_COLUMNS)
+    df_entities = read_parts(manifest, 'entities', ENTITY_COLUMNS)
+    df_articles = read_parts(manifest, 'articles', ARTICLE_COLUMNS)
+    return (df_entities.sort_values('published_at', ascending=False, ignore_index=True),
+            df_articles.sort_values('published_at', ascending=False, ignore_index=True))
+
+@st.cache_data
+def load_rollups(exported_at):
+    # Hourly counts exported from aml.db's rollup tables (kind, hour, source, risk_level, count)
+    path = os.path.join(SNAPSHOT_DIR, 'rollups.parquet')
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=['kind', 'hour', 'source', 'risk_level', 'count'])
+    return pq.read_table(path, memory_map=True).to_pandas()
+
+@st.cache_resource
+def open_content(exported_at):
+    """
+    Memory-mapped article bodies (the content store), kept apart from the
+    light article index. Opening it reads no bodies; each part is sorted by
+    id, so a body is found by binary search over the mapped id column.
+    """
+    manifest = load_manifest()
+    parts = []
+    for name in (manifest['parts']['content'] if manifest else []):
+        table = ipc.open_file(pa.memory_map(os.path.join(SNAPSHOT_DIR, name))).read_all()
+        parts.append((table.column('id').combine_chunks().to_numpy(), table.column('content')))
+    return parts
+
+def get_content(article_id):
+    for ids, content in open_content(exported_at):
+        row = int(ids.searchsorted(article_id))
+        if row < len(ids) and ids[row] == article_id:
+            return content[row].as_py() or ''
+    return ''
+
+manifest = load_manifest()
+exported_at = manifest.get('exported_at') if manifest else None
+df_entities, df_articles = load_data(exported_at)
+df_rollups = load_rollups(exported_at)
 
-df_entities, df_articles = load_data()
+def rollup_total(kind, since_hour=None, risk_level=None):
+    rows = df_rollups[df_rollups['kind'] == kind]
+    if since_hour is not None:
+        rows = rows[rows['hour'] >= since_hour]
+    if risk_level is not None:
+        rows = rows[rows['risk_level'] == risk_level]
+    return int(rows['count'].sum())
 
 # Sidebar
 with st.sidebar:
@@ -32,14 +103,22 @@ with st.sidebar:
 st.title("🕵️ Real-time AML Emerging Watchlist")
 st.markdown("### 🚨 High Priority Entities (Detected by Gemini 2.0)")
 
-# Metrics
+# Metrics (from the exported rollups, bucketed by publication hour)
+last_24h = int(time.time()) // 3600 - 24
+article_rollups = df_rollups[(df_rollups['kind'] == 'articles') & (df_rollups['count'] > 0)]
 col1, col2, col3 = st.columns(3)
 with col1:
-    st.metric("New Entities (24h)", len(df_entities[df_entities['date'] >= pd.Timestamp.now().strftime('%Y-%m-%d')]))
+    st.metric("New Entities (24h)", rollup_total('new_entities', since_hour=last_24h))
 with col2:
-    st.metric("High Risks", len(df_entities[df_entities['type'].str.contains('High', case=False, na=False)]))
+    st.metric("High Risks", rollup_total('mentions', risk_level='High'))
 with col3:
-    st.metric("Sources Active", df_articles['source'].nunique() if not df_articles.empty else 0)
+    st.metric("Sources Active", article_rollups['source'].nunique())
+
+mention_rollups = df_rollups[df_rollups['kind'] == 'mentions']
+if not mention_rollups.empty:
+    with st.expander("📈 Mentions per day by risk level"):
+        trend = mention_rollups.assign(day=pd.to_datetime(mention_rollups['hour'] * 3600, unit='s').dt.date)
+        st.bar_chart(trend.pivot_table(index='day', columns='risk_level', values='count', aggfunc='sum', fill_value=0))
 
 # Filter
 search = st.text_input("🔍 Search Entities", placeholder="Filter by name or risk type...")
@@ -49,9 +128,11 @@ if search and not df_entities.empty:
         df_entities['type'].str.contains(search, case=False, na=False)
     ]
 
+REPORTS_PAGE_SIZE = 25
+
 # Display Table
 st.dataframe(
-    df_entities,
+    df_entities.drop(columns=['published_at']),
     column_config={
         "url": st.column_config.LinkColumn("Source Link"),
         "type": st.column_config.TextColumn("Risk Classification"),
@@ -63,7 +144,40 @@ st.dataframe(
 st.markdown("---")
 st.markdown("### 📰 Recent Intelligence Reports")
 
-for _, row in df_articles.iterrows():
-    with st.expander(f"{row['date']} | {row['source']} | {row['title']}"):
-        st.markdown(f"**Source**: [{row['url']}]({row['url']})")
-        st.write(row['content'])
+# Only one page of the light index is rendered; a report's body is read
+# from the content store when it is selected.
+col_source, col_filter = st.columns([1, 2])
+with col_source:
+    report_sources = st.multiselect("Source", sorted(df_articles['source'].unique()))
+with col_filter:
+    report_filter = st.text_input("Filter reports", placeholder="Words in the title...")
+reports = df_articles
+if report_sources:
+    reports = reports[reports['source'].isin(report_sources)]
+if report_filter:
+    reports = reports[reports['title'].str.contains(report_filter, case=False, na=False, regex=False)]
+
+n_pages = max(1, -(-len(reports) // REPORTS_PAGE_SIZE))
+page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, step=1)
+page_reports = reports.iloc[(page - 1) * REPORTS_PAGE_SIZE:page * REPORTS_PAGE_SIZE]
+st.caption(f"{len(reports)} reports")
+
+selection = st.dataframe(
+    page_reports[['date', 'source', 'title', 'url']],
+    column_config={
+        "url": st.column_config.LinkColumn("Source Link"),
+    },
+    use_container_width=True,
+    hide_index=True,
+    on_select="rerun",
+    selection_mode="single-row",
+    key=f"reports_{page}",
+)
+
+if selection.selection.rows:
+    row = page_reports.iloc[selection.selection.rows[0]]
+    st.markdown(f"#### {row['title']}")
+    st.markdown(f"{row['date']} | {row['source']} | **Source**: [{row['url']}]({row['url']})")
+    st.write(get_content(row['id']))
+else:
+    st.caption("Select a report to read it.")
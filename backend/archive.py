@@ -0,0 +1,94 @@
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Raw HTTP responses kept on disk so pages can be re-parsed without refetching.
+# Bodies are gzipped and named by the SHA-256 of their content, so a listing
+# page that did not change between polls is stored once. The index (which URL
+# returned which body, when, with which headers) is a small SQLite file.
+ARCHIVE_DIR = os.path.join(os.path.dirname(__file__), 'archive')
+INDEX_NAME = 'index.db'
+
+_local = threading.local()
+
+def _get_conn():
+    path = os.path.join(ARCHIVE_DIR, INDEX_NAME)
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.path != path:
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=5)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_url ON responses(url, fetched_at)')
+        conn.commit()
+        _local.conn = conn
+        _local.path = path
+    return conn
+
+def _blob_path(digest):
+    return os.path.join(ARCHIVE_DIR, 'objects', digest[:2], digest + '.gz')
+
+def store(url, status, headers, body):
+    """
+    Archives one response. The body is written only if no identical body is
+    stored yet; the index row is always added.
+    """
+    digest = hashlib.sha256(body).hexdigest()
+    path = _blob_path(digest)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    conn = _get_conn()
+    with conn:
+        conn.execute(
+            'INSERT INTO responses (url, fetched_at, status, headers, sha256, size) VALUES (?, ?, ?, ?, ?, ?)',
+            (url, time.time(), status, json.dumps(dict(headers)), digest, len(body))
+        )
+    return digest
+
+def lookup(url):
+    """
+    The newest archived response for `url` as a dict with url, fetched_at,
+    status, headers and body, or None if it was never archived.
+    """
+    row = _get_conn().execute(
+        'SELECT fetched_at, status, headers, sha256 FROM responses WHERE url = ? ORDER BY fetched_at DESC LIMIT 1',
+        (url,)
+    ).fetchone()
+    if row is None:
+        return None
+    fetched_at, status, headers, digest = row
+    try:
+        with gzip.open(_blob_path(digest), 'rb') as f:
+            body = f.read()
+    except OSError:
+        return None
+    return {'url': url, 'fetched_at': fetched_at, 'status': status, 'headers': json.loads(headers), 'body': body}
+
+def stats():
+    conn = _get_conn()
+    responses, urls, raw = conn.execute('SELECT COUNT(*), COUNT(DISTINCT url), COALESCE(SUM(size), 0) FROM responses').fetchone()
+    stored = 0
+    objects_dir = os.path.join(ARCHIVE_DIR, 'objects')
+    for root, _, files in os.walk(objects_dir):
+        stored += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return {'responses': responses, 'urls': urls, 'bytes_fetched': raw, 'bytes_stored': stored}
@@ -1,18 +1,72 @@
 import sqlite3
 import os
+import re
+import threading
+import time
 from datetime import datetime
 
+from backend import dates
+from backend import names
+
 DB_PATH = os.path.join(os.path.dirname(__file__), 'aml.db')
 
-def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
+# SQLite's default limit on host parameters per statement is 999
+MAX_SQL_VARIABLES = 900
+
+# Process-wide index of article URLs already stored.
+# None until load_seen_urls() is called; kept up to date by save_article.
+_seen_urls = None
+_seen_urls_lock = threading.Lock()
+
+# Milliseconds a connection waits for another one's write lock
+BUSY_TIMEOUT_MS = 5000
+
+# Applied to every connection. WAL lets the dashboard read while the updater
+# writes; NORMAL sync is durable enough in WAL mode and avoids an fsync per commit.
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}',
+    'PRAGMA cache_size=-32000',      # ~32 MB page cache
+    'PRAGMA mmap_size=268435456',    # 256 MB memory-mapped reads
+    'PRAGMA temp_store=MEMORY',
+)
+
+# Size of each connection's prepared-statement cache
+STATEMENT_CACHE_SIZE = 256
+
+# One long-lived connection per thread (sqlite3 connections are not shareable
+# across threads by default, and reusing one keeps its statement cache warm).
+_local = threading.local()
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, timeout=5, cached_statements=STATEMENT_CACHE_SIZE)
     conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
     return conn
 
-def init_db():
-    conn = get_db_connection()
-    c = conn.cursor()
-    
+def get_db_connection():
+    """
+    Returns this thread's connection, opening it on first use.
+    Do not close it; call close_db_connection() when a thread is done.
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.path != DB_PATH:
+        if conn is not None:
+            conn.close()
+        conn = _connect()
+        _local.conn = conn
+        _local.path = DB_PATH
+    return conn
+
+def close_db_connection():
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+def _migration_1_initial(c):
     # Articles Table
     c.execute('''
         CREATE TABLE IF NOT EXISTS articles (
@@ -36,60 +90,934 @@ def init_db():
             FOREIGN KEY(article_id) REFERENCES articles(id)
         )
     ''')
-    
-    conn.commit()
-    conn.close()
+
+def _migration_2_published_at(c):
+    """
+    Adds articles.published_at (epoch seconds, UTC) to databases created before
+    it existed, backfills it from the free-text date and indexes it.
+    Rows whose date can't be parsed fall back to their ingest time.
+    """
+    columns = {row[1] for row in c.execute('PRAGMA table_info(articles)')}
+    if 'published_at' not in columns:
+        c.execute('ALTER TABLE articles ADD COLUMN published_at INTEGER')
+
+    rows = c.execute(
+        "SELECT id, source, date, CAST(strftime('%s', created_at) AS INTEGER) FROM articles WHERE published_at IS NULL"
+    ).fetchall()
+    updates = [(dates.to_epoch(date, source) or created, article_id)
+               for article_id, source, date, created in rows]
+    if updates:
+        c.executemany('UPDATE articles SET published_at = ? WHERE id = ?', updates)
+        print(f"Backfilled published_at for {len(updates)} articles")
+
+    c.execute('CREATE INDEX IF NOT EXISTS idx_articles_published_at ON articles(published_at)')
+
+def _migration_3_checkpoints(c):
+    # Per-source high-water mark for incremental polling
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS source_checkpoints (
+            source TEXT PRIMARY KEY,
+            last_url TEXT,
+            last_date TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def _migration_4_hot_query_indexes(c):
+    """
+    Covering indexes for the hot read paths (see HOT_QUERIES and
+    check_query_plans.py): the entities side of recent-entities joins,
+    per-source listings and name/type lookups.
+    """
+    c.execute('CREATE INDEX IF NOT EXISTS idx_entities_article ON entities(article_id, name, type)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_entities_name ON entities(name COLLATE NOCASE, type, article_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_entities_type ON entities(type, article_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_articles_source_published ON articles(source, published_at)')
+
+def _migration_5_full_text_search(c):
+    """
+    FTS5 indexes over article titles/content and entity names. Both are
+    external-content tables (no second copy of the text) kept in sync by
+    triggers, so every writer, including the cleanup scripts, updates them.
+    """
+    c.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+            title, content,
+            content='articles', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    ''')
+    c.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS entities_fts USING fts5(
+            name,
+            content='entities', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    ''')
+    for statement in (
+        '''CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+            INSERT INTO articles_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+            INSERT INTO articles_fts(articles_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE OF title, content ON articles BEGIN
+            INSERT INTO articles_fts(articles_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+            INSERT INTO articles_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS entities_fts_insert AFTER INSERT ON entities BEGIN
+            INSERT INTO entities_fts(rowid, name) VALUES (new.id, new.name);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS entities_fts_delete AFTER DELETE ON entities BEGIN
+            INSERT INTO entities_fts(entities_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS entities_fts_update AFTER UPDATE OF name ON entities BEGIN
+            INSERT INTO entities_fts(entities_fts, rowid, name) VALUES ('delete', old.id, old.name);
+            INSERT INTO entities_fts(rowid, name) VALUES (new.id, new.name);
+        END''',
+    ):
+        c.execute(statement)
+
+    # Index rows that existed before the triggers
+    c.execute("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')")
+    c.execute("INSERT INTO entities_fts(entities_fts) VALUES ('rebuild')")
+
+def _migration_6_canonical_entities(c):
+    """
+    One row per distinct actor (keyed on names.normalize_name) with its
+    spellings, per-article mentions, mention count and first/last seen
+    (published_at). Kept current by save_articles; the raw `entities` table
+    stays as the per-extraction log other tools read.
+    """
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS canonical_entities (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            norm_name TEXT UNIQUE NOT NULL,
+            name TEXT NOT NULL,
+            type TEXT,
+            mention_count INTEGER NOT NULL DEFAULT 0,
+            first_seen INTEGER,
+            last_seen INTEGER
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS entity_aliases (
+            entity_id INTEGER NOT NULL,
+            alias TEXT NOT NULL,
+            mention_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (entity_id, alias),
+            FOREIGN KEY(entity_id) REFERENCES canonical_entities(id)
+        ) WITHOUT ROWID
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS entity_mentions (
+            entity_id INTEGER NOT NULL,
+            article_id INTEGER NOT NULL,
+            type TEXT,
+            PRIMARY KEY (entity_id, article_id),
+            FOREIGN KEY(entity_id) REFERENCES canonical_entities(id),
+            FOREIGN KEY(article_id) REFERENCES articles(id)
+        ) WITHOUT ROWID
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_entity_mentions_article ON entity_mentions(article_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_canonical_entities_last_seen ON canonical_entities(last_seen)')
+
+    # Deleting articles (reset_recent.py, wipe_db.py) unlinks their mentions.
+    # first/last_seen are not recomputed; views skip entities left with no mentions.
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS entity_mentions_article_delete AFTER DELETE ON articles BEGIN
+            UPDATE canonical_entities SET mention_count = mention_count - 1
+            WHERE id IN (SELECT entity_id FROM entity_mentions WHERE article_id = old.id);
+            DELETE FROM entity_mentions WHERE article_id = old.id;
+        END
+    ''')
+
+    # Backfill from the existing extraction log, oldest first. Everything
+    # derived is rebuilt, so running this again doesn't count aliases twice.
+    c.execute('DELETE FROM entity_mentions')
+    c.execute('DELETE FROM entity_aliases')
+    c.execute('DELETE FROM canonical_entities')
+    rows = c.execute('''
+        SELECT e.name, e.type, e.article_id, a.published_at
+        FROM entities e
+        JOIN articles a ON a.id = e.article_id
+        ORDER BY a.published_at, e.id
+    ''').fetchall()
+    for name, entity_type, article_id, published_at in rows:
+        _record_mention(c, name, entity_type, article_id, published_at)
+    if rows:
+        print(f"Backfilled canonical entities from {len(rows)} mentions")
+
+def _migration_7_ingest_state(c):
+    """
+    A single-row change counter for readers that cache query results (the
+    dashboard). save_articles bumps it once per committed batch; the trigger
+    covers rows deleted by the cleanup scripts.
+    """
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS ingest_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at INTEGER
+        )
+    ''')
+    c.execute('INSERT OR IGNORE INTO ingest_state (id, version, updated_at) VALUES (1, 0, ?)', (int(time.time()),))
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS ingest_state_article_delete AFTER DELETE ON articles BEGIN
+            UPDATE ingest_state SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+            WHERE id = 1;
+        END
+    ''')
+
+# "High - Sanction" -> "High"; shared by the rollup triggers and their backfill
+RISK_LEVEL_SQL = '''CASE
+    WHEN {col} LIKE 'High%' THEN 'High'
+    WHEN {col} LIKE 'Medium%' THEN 'Medium'
+    WHEN {col} LIKE 'Low%' THEN 'Low'
+    ELSE 'Unknown' END'''
+
+def _migration_8_rollups(c):
+    """
+    Hourly rollups of articles (by source), entity mentions (by source and
+    risk level) and newly seen canonical entities (by risk level), bucketed
+    on published_at. Triggers keep them in the same transaction as the rows
+    they count, so dashboard metrics and trends never touch the raw tables.
+    """
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS rollup_articles (
+            hour INTEGER NOT NULL,
+            source TEXT NOT NULL,
+            articles INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (hour, source)
+        ) WITHOUT ROWID
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS rollup_mentions (
+            hour INTEGER NOT NULL,
+            source TEXT NOT NULL,
+            risk_level TEXT NOT NULL,
+            mentions INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (hour, source, risk_level)
+        ) WITHOUT ROWID
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS rollup_new_entities (
+            hour INTEGER NOT NULL,
+            risk_level TEXT NOT NULL,
+            entities INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (hour, risk_level)
+        ) WITHOUT ROWID
+    ''')
+
+    new_level = RISK_LEVEL_SQL.format(col='new.type')
+    old_level = RISK_LEVEL_SQL.format(col='old.type')
+    for statement in (
+        '''CREATE TRIGGER IF NOT EXISTS rollup_articles_insert AFTER INSERT ON articles BEGIN
+            INSERT INTO rollup_articles (hour, source, articles) VALUES (new.published_at / 3600, new.source, 1)
+            ON CONFLICT(hour, source) DO UPDATE SET articles = articles + 1;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS rollup_articles_delete AFTER DELETE ON articles BEGIN
+            UPDATE rollup_articles SET articles = articles - 1
+            WHERE hour = old.published_at / 3600 AND source = old.source;
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS rollup_mentions_insert AFTER INSERT ON entities BEGIN
+            INSERT INTO rollup_mentions (hour, source, risk_level, mentions)
+            SELECT a.published_at / 3600, a.source, {new_level}, 1 FROM articles a WHERE a.id = new.article_id
+            ON CONFLICT(hour, source, risk_level) DO UPDATE SET mentions = mentions + 1;
+        END''',
+        # The cleanup scripts delete entities before their articles
+        f'''CREATE TRIGGER IF NOT EXISTS rollup_mentions_delete AFTER DELETE ON entities BEGIN
+            UPDATE rollup_mentions SET mentions = mentions - 1
+            WHERE (hour, source) = (SELECT a.published_at / 3600, a.source FROM articles a WHERE a.id = old.article_id)
+              AND risk_level = {old_level};
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS rollup_new_entities_insert AFTER INSERT ON canonical_entities BEGIN
+            INSERT INTO rollup_new_entities (hour, risk_level, entities) VALUES (new.first_seen / 3600, {new_level}, 1)
+            ON CONFLICT(hour, risk_level) DO UPDATE SET entities = entities + 1;
+        END''',
+    ):
+        c.execute(statement)
+
+    # Backfill from what is already stored
+    c.execute('DELETE FROM rollup_articles')
+    c.execute('DELETE FROM rollup_mentions')
+    c.execute('DELETE FROM rollup_new_entities')
+    c.execute('''
+        INSERT INTO rollup_articles (hour, source, articles)
+        SELECT published_at / 3600, source, COUNT(*) FROM articles GROUP BY 1, 2
+    ''')
+    c.execute(f'''
+        INSERT INTO rollup_mentions (hour, source, risk_level, mentions)
+        SELECT a.published_at / 3600, a.source, {RISK_LEVEL_SQL.format(col='e.type')}, COUNT(*)
+        FROM entities e JOIN articles a ON a.id = e.article_id
+        GROUP BY 1, 2, 3
+    ''')
+    c.execute(f'''
+        INSERT INTO rollup_new_entities (hour, risk_level, entities)
+        SELECT first_seen / 3600, {RISK_LEVEL_SQL.format(col='type')}, COUNT(*)
+        FROM canonical_entities GROUP BY 1, 2
+    ''')
+
+def _migration_9_stemmed_article_search(c):
+    """
+    Re-indexes article titles/content with the Porter stemmer, so search can
+    match article words exactly ("sanction" still finds "Sanctions") instead
+    of as prefixes, which FTS5 expands over the whole index on every query.
+    Entity names keep prefix matching. The triggers write by table name and
+    carry over.
+    """
+    c.execute('DROP TABLE IF EXISTS articles_fts')
+    c.execute('''
+        CREATE VIRTUAL TABLE articles_fts USING fts5(
+            title, content,
+            content='articles', content_rowid='id',
+            tokenize='porter unicode61 remove_diacritics 2'
+        )
+    ''')
+    c.execute("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')")
+
+def _migration_10_entity_cleanup(c):
+    """
+    Deleting articles left canonical entities behind with no mentions, stale
+    first/last seen and their count still in rollup_new_entities. Now the
+    article delete trigger recomputes first/last seen from the remaining
+    mentions, an entity whose last mention goes is deleted with its aliases,
+    and rollup_new_entities counts entities with at least one mention in the
+    hour of their (current) first_seen, moving them as that changes.
+    """
+    old_level = RISK_LEVEL_SQL.format(col='old.type')
+    new_level = RISK_LEVEL_SQL.format(col='new.type')
+    for trigger in ('entity_mentions_article_delete', 'rollup_new_entities_insert',
+                    'canonical_entities_orphan', 'rollup_new_entities_update'):
+        c.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    for statement in (
+        '''CREATE TRIGGER entity_mentions_article_delete AFTER DELETE ON articles BEGIN
+            UPDATE canonical_entities SET
+                mention_count = mention_count - 1,
+                first_seen = (SELECT MIN(a.published_at) FROM entity_mentions m JOIN articles a ON a.id = m.article_id
+                              WHERE m.entity_id = canonical_entities.id),
+                last_seen = (SELECT MAX(a.published_at) FROM entity_mentions m JOIN articles a ON a.id = m.article_id
+                             WHERE m.entity_id = canonical_entities.id)
+            WHERE id IN (SELECT entity_id FROM entity_mentions WHERE article_id = old.id);
+            DELETE FROM entity_mentions WHERE article_id = old.id;
+        END''',
+        '''CREATE TRIGGER canonical_entities_orphan AFTER UPDATE OF mention_count ON canonical_entities
+        WHEN new.mention_count <= 0 BEGIN
+            DELETE FROM entity_mentions WHERE entity_id = old.id;
+            DELETE FROM entity_aliases WHERE entity_id = old.id;
+            DELETE FROM canonical_entities WHERE id = old.id;
+        END''',
+        f'''CREATE TRIGGER rollup_new_entities_update AFTER UPDATE OF mention_count, first_seen, type ON canonical_entities
+        WHEN old.first_seen IS NOT new.first_seen OR old.type IS NOT new.type
+          OR (old.mention_count > 0) != (new.mention_count > 0) BEGIN
+            UPDATE rollup_new_entities SET entities = entities - 1
+            WHERE old.mention_count > 0 AND hour = old.first_seen / 3600 AND risk_level = {old_level};
+            INSERT INTO rollup_new_entities (hour, risk_level, entities)
+            SELECT new.first_seen / 3600, {new_level}, 1 WHERE new.mention_count > 0
+            ON CONFLICT(hour, risk_level) DO UPDATE SET entities = entities + 1;
+        END''',
+    ):
+        c.execute(statement)
+
+    # Repair what earlier deletes left behind
+    c.execute('''
+        UPDATE canonical_entities SET
+            mention_count = (SELECT COUNT(*) FROM entity_mentions m WHERE m.entity_id = canonical_entities.id),
+            first_seen = (SELECT MIN(a.published_at) FROM entity_mentions m JOIN articles a ON a.id = m.article_id
+                          WHERE m.entity_id = canonical_entities.id),
+            last_seen = (SELECT MAX(a.published_at) FROM entity_mentions m JOIN articles a ON a.id = m.article_id
+                         WHERE m.entity_id = canonical_entities.id)
+    ''')
+    c.execute('DELETE FROM rollup_new_entities')
+    c.execute(f'''
+        INSERT INTO rollup_new_entities (hour, risk_level, entities)
+        SELECT first_seen / 3600, {RISK_LEVEL_SQL.format(col='type')}, COUNT(*)
+        FROM canonical_entities WHERE mention_count > 0 GROUP BY 1, 2
+    ''')
+
+# How long a process waits for another one's migration to finish. Rebuilding
+# an index over a large database takes longer than the usual busy timeout.
+MIGRATION_BUSY_TIMEOUT_MS = 120000
+
+# Ordered schema migrations. PRAGMA user_version records the last one applied.
+# Append new steps; never edit or reorder applied ones. Every step must also be
+# safe on databases that predate this runner (user_version 0, tables present).
+MIGRATIONS = [
+    (1, 'articles and entities tables', _migration_1_initial),
+    (2, 'normalized articles.published_at', _migration_2_published_at),
+    (3, 'source_checkpoints table', _migration_3_checkpoints),
+    (4, 'covering indexes for hot queries', _migration_4_hot_query_indexes),
+    (5, 'FTS5 search over articles and entities', _migration_5_full_text_search),
+    (6, 'canonical entities, aliases and mentions', _migration_6_canonical_entities),
+    (7, 'ingest_state change counter', _migration_7_ingest_state),
+    (8, 'hourly rollups for dashboard metrics', _migration_8_rollups),
+    (9, 'stemmed article search', _migration_9_stemmed_article_search),
+    (10, 'drop entities whose mentions were all deleted', _migration_10_entity_cleanup),
+]
+
+def get_schema_version():
+    return get_db_connection().execute('PRAGMA user_version').fetchone()[0]
+
+def migrate():
+    """
+    Applies pending migrations, each in its own transaction together with
+    its version bump, so an interrupted upgrade resumes where it stopped.
+    Each transaction takes the write lock before it reads the version, so
+    when two processes (dashboard and updater) start on an old database,
+    one waits for the other and then skips the steps already applied.
+    """
+    conn = get_db_connection()
+    current = get_schema_version()
+    conn.execute(f'PRAGMA busy_timeout={MIGRATION_BUSY_TIMEOUT_MS}')
+    try:
+        for version, description, step in MIGRATIONS:
+            if version <= current:
+                continue
+            c = conn.cursor()
+            try:
+                c.execute('BEGIN IMMEDIATE')
+                current = get_schema_version()
+                if version <= current:
+                    conn.rollback()
+                    continue
+                step(c)
+                c.execute(f'PRAGMA user_version = {version}')
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            print(f"Applied migration {version}: {description}")
+    finally:
+        conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+    return get_schema_version()
+
+def init_db():
+    migrate()
     print(f"Database initialized at {DB_PATH}")
 
+def load_seen_urls():
+    """
+    Loads every stored article URL into memory in one query.
+    After this, article_exists/existing_urls are pure set lookups.
+    """
+    global _seen_urls
+    conn = get_db_connection()
+    urls = {row[0] for row in conn.execute('SELECT url FROM articles')}
+    with _seen_urls_lock:
+        _seen_urls = urls
+    return len(urls)
+
 def article_exists(url):
+    if _seen_urls is not None:
+        return url in _seen_urls
     conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('SELECT 1 FROM articles WHERE url = ?', (url,))
-    result = c.fetchone()
-    conn.close()
+    result = conn.execute('SELECT 1 FROM articles WHERE url = ?', (url,)).fetchone()
     return result is not None
 
+def existing_urls(urls):
+    """
+    Returns the subset of `urls` already stored, using one query per
+    MAX_SQL_VARIABLES urls (or no query at all once the seen-URL index is loaded).
+    """
+    urls = list(set(urls))
+    if _seen_urls is not None:
+        return {url for url in urls if url in _seen_urls}
+
+    found = set()
+    conn = get_db_connection()
+    for i in range(0, len(urls), MAX_SQL_VARIABLES):
+        chunk = urls[i:i + MAX_SQL_VARIABLES]
+        placeholders = ','.join('?' * len(chunk))
+        rows = conn.execute(f'SELECT url FROM articles WHERE url IN ({placeholders})', chunk)
+        found.update(row[0] for row in rows)
+    return found
+
+def _mark_seen(url):
+    if _seen_urls is not None:
+        with _seen_urls_lock:
+            _seen_urls.add(url)
+
+def _insert_article(c, source, title, url, date, content, entities):
+    # Normalized at ingest so recency queries can use the index
+    published_at = dates.to_epoch(date, source) or int(time.time())
+    c.execute(
+        'INSERT INTO articles (source, title, url, date, content, published_at) VALUES (?, ?, ?, ?, ?, ?)',
+        (source, title, url, date, content, published_at)
+    )
+    article_id = c.lastrowid
+    
+    for entity in entities:
+        if not entity.get('name'):
+            continue
+        c.execute(
+            'INSERT INTO entities (name, type, article_id) VALUES (?, ?, ?)',
+            (entity['name'], entity['type'], article_id)
+        )
+        _record_mention(c, entity['name'], entity['type'], article_id, published_at)
+    return article_id
+
+def _delete_article(c, url):
+    # Entities first: their aliases are uncounted here, and the delete
+    # triggers unlink the article's mentions, rollups and search rows
+    row = c.execute('SELECT id FROM articles WHERE url = ?', (url,)).fetchone()
+    if row is None:
+        return
+    for (name,) in c.execute('SELECT name FROM entities WHERE article_id = ?', row).fetchall():
+        c.execute('''
+            UPDATE entity_aliases SET mention_count = mention_count - 1
+            WHERE alias = ? AND entity_id = (SELECT id FROM canonical_entities WHERE norm_name = ?)
+        ''', (name, names.normalize_name(name)))
+    c.execute('DELETE FROM entities WHERE article_id = ?', row)
+    c.execute('DELETE FROM articles WHERE id = ?', row)
+
+def _record_mention(c, name, entity_type, article_id, published_at):
+    """
+    Links one extracted name to its canonical entity, creating the entity on
+    first sight. Every spelling is counted as an alias; mention count,
+    first/last seen and the latest risk type only move the first time an
+    entity is linked to a given article.
+    """
+    norm_name = names.normalize_name(name)
+    if not norm_name:
+        return
+    c.execute('''
+        INSERT INTO canonical_entities (norm_name, name, type, mention_count, first_seen, last_seen)
+        VALUES (?, ?, ?, 0, ?, ?)
+        ON CONFLICT(norm_name) DO NOTHING
+    ''', (norm_name, name, entity_type, published_at, published_at))
+    entity_id = c.execute('SELECT id FROM canonical_entities WHERE norm_name = ?', (norm_name,)).fetchone()[0]
+
+    c.execute('''
+        INSERT INTO entity_aliases (entity_id, alias, mention_count) VALUES (?, ?, 1)
+        ON CONFLICT(entity_id, alias) DO UPDATE SET mention_count = mention_count + 1
+    ''', (entity_id, name))
+    c.execute(
+        'INSERT OR IGNORE INTO entity_mentions (entity_id, article_id, type) VALUES (?, ?, ?)',
+        (entity_id, article_id, entity_type)
+    )
+    if c.rowcount == 0:
+        return
+
+    c.execute('''
+        UPDATE canonical_entities SET
+            mention_count = mention_count + 1,
+            first_seen = MIN(COALESCE(first_seen, :seen), :seen),
+            last_seen = MAX(COALESCE(last_seen, :seen), :seen),
+            type = CASE WHEN :seen >= COALESCE(last_seen, :seen) THEN :type ELSE type END
+        WHERE id = :id
+    ''', {'seen': published_at, 'type': entity_type, 'id': entity_id})
+
 def save_article(source, title, url, date, content, entities):
-    if article_exists(url):
-        return False
-        
+    saved = save_articles([{
+        'source': source, 'title': title, 'url': url,
+        'date': date, 'content': content, 'entities': entities
+    }])
+    return bool(saved)
+
+def save_articles(articles, replace=False):
+    """
+    Stores many articles in a single transaction (used by the pipeline writer).
+    Each article is a dict with source, title, url, date, content and entities.
+    A duplicate or invalid article is rolled back on its own without losing
+    the rest of the batch. With replace=True an article whose url is already
+    stored replaces it (row and entities) instead of being a duplicate.
+    Returns the urls that were stored.
+    """
     conn = get_db_connection()
     c = conn.cursor()
+    saved = []
+    duplicates = []
     try:
-        c.execute(
-            'INSERT INTO articles (source, title, url, date, content) VALUES (?, ?, ?, ?, ?)',
-            (source, title, url, date, content)
-        )
-        article_id = c.lastrowid
-        
-        for entity in entities:
-             c.execute(
-                'INSERT INTO entities (name, type, article_id) VALUES (?, ?, ?)',
-                (entity['name'], entity['type'], article_id)
-            )
-        
+        c.execute('BEGIN')
+        for article in articles:
+            url = article['url']
+            # Only the in-memory index is consulted here; the UNIQUE constraint on
+            # url catches anything it does not know about.
+            if not replace and _seen_urls is not None and url in _seen_urls:
+                continue
+            c.execute('SAVEPOINT article')
+            try:
+                if replace:
+                    _delete_article(c, url)
+                _insert_article(c, article['source'], article['title'], url,
+                                article['date'], article['content'], article['entities'])
+                c.execute('RELEASE article')
+                saved.append(url)
+            except sqlite3.IntegrityError as e:
+                c.execute('ROLLBACK TO article')
+                c.execute('RELEASE article')
+                if 'UNIQUE' in str(e):
+                    duplicates.append(url)
+        if saved:
+            c.execute('UPDATE ingest_state SET version = version + 1, updated_at = ? WHERE id = 1', (int(time.time()),))
         conn.commit()
-        return True
-    except sqlite3.IntegrityError:
-        return False
-    finally:
-        conn.close()
+    except Exception:
+        conn.rollback()
+        raise
+
+    for url in saved + duplicates:
+        _mark_seen(url)
+    return saved
+
+# Hot read queries, kept in one place so check_query_plans.py can assert that
+# none of them regresses to a full table scan.
+RECENT_ARTICLES_SQL = '''
+    SELECT id, source, title, url, date, content, created_at, published_at
+    FROM articles
+    ORDER BY published_at DESC, id DESC
+    LIMIT ?
+'''
+
+# Keyset pages: continue strictly after the last row of the previous page,
+# so page N costs the same as page 1 (no OFFSET scan).
+ARTICLES_BEFORE_SQL = '''
+    SELECT id, source, title, url, date, content, created_at, published_at
+    FROM articles
+    WHERE (published_at, id) < (?, ?)
+    ORDER BY published_at DESC, id DESC
+    LIMIT ?
+'''
+
+RECENT_ENTITIES_SQL = '''
+    SELECT e.name, e.type, a.source, a.date, a.title, a.url, a.published_at, e.id
+    FROM entities e
+    JOIN articles a ON e.article_id = a.id
+    ORDER BY a.published_at DESC, e.id DESC
+    LIMIT ?
+'''
+
+ENTITIES_BEFORE_SQL = '''
+    SELECT e.name, e.type, a.source, a.date, a.title, a.url, a.published_at, e.id
+    FROM entities e
+    JOIN articles a ON e.article_id = a.id
+    WHERE a.published_at <= ? AND (a.published_at, e.id) < (?, ?)
+    ORDER BY a.published_at DESC, e.id DESC
+    LIMIT ?
+'''
+
+ARTICLES_SINCE_SQL = '''
+    SELECT id, source, title, url, date, content, created_at
+    FROM articles
+    WHERE published_at >= ?
+    ORDER BY published_at DESC
+    LIMIT ?
+'''
+
+ARTICLES_BY_SOURCE_SQL = '''
+    SELECT id, source, title, url, date, content, created_at
+    FROM articles
+    WHERE source = ?
+    ORDER BY published_at DESC
+    LIMIT ?
+'''
+
+ENTITIES_BY_NAME_SQL = '''
+    SELECT e.name, e.type, a.source, a.date, a.title, a.url
+    FROM entities e
+    JOIN articles a ON e.article_id = a.id
+    WHERE e.name = ? COLLATE NOCASE
+    ORDER BY a.published_at DESC
+    LIMIT ?
+'''
+
+ENTITIES_BY_TYPE_SQL = '''
+    SELECT e.name, e.type, a.source, a.date, a.title, a.url
+    FROM entities e
+    JOIN articles a ON e.article_id = a.id
+    WHERE e.type = ?
+    LIMIT ?
+'''
+
+WATCHLIST_SQL = '''
+    SELECT id, name, type, mention_count, first_seen, last_seen
+    FROM canonical_entities
+    WHERE mention_count > 0
+    ORDER BY last_seen DESC, id DESC
+    LIMIT ?
+'''
 
-def get_recent_articles(limit=50):
+WATCHLIST_BEFORE_SQL = '''
+    SELECT id, name, type, mention_count, first_seen, last_seen
+    FROM canonical_entities
+    WHERE mention_count > 0 AND last_seen <= ? AND (last_seen, id) < (?, ?)
+    ORDER BY last_seen DESC, id DESC
+    LIMIT ?
+'''
+
+ENTITY_ARTICLES_SQL = '''
+    SELECT a.id, a.source, a.date, a.title, a.url, a.published_at
+    FROM entity_mentions m
+    JOIN articles a ON a.id = m.article_id
+    WHERE m.entity_id = ?
+    ORDER BY a.published_at DESC
+    LIMIT ?
+'''
+
+# ENTITY_ARTICLES_SQL for several entities at once; {placeholders} is filled
+# with one ? per entity id
+ENTITIES_ARTICLES_SQL = '''
+    SELECT entity_id, id, source, date, title, url, published_at
+    FROM (
+        SELECT m.entity_id, a.id, a.source, a.date, a.title, a.url, a.published_at,
+               ROW_NUMBER() OVER (PARTITION BY m.entity_id ORDER BY a.published_at DESC) AS n
+        FROM entity_mentions m
+        JOIN articles a ON a.id = m.article_id
+        WHERE m.entity_id IN ({placeholders})
+    )
+    WHERE n <= ?
+    ORDER BY entity_id, published_at DESC
+'''
+
+ROLLUP_TOTALS_SQL = '''
+    SELECT
+        (SELECT COALESCE(SUM(articles), 0) FROM rollup_articles WHERE hour >= :hour),
+        (SELECT COUNT(DISTINCT source) FROM rollup_articles WHERE hour >= :hour AND articles > 0),
+        (SELECT COALESCE(SUM(mentions), 0) FROM rollup_mentions WHERE hour >= :hour),
+        (SELECT COALESCE(SUM(mentions), 0) FROM rollup_mentions WHERE hour >= :hour AND risk_level = 'High'),
+        (SELECT COALESCE(SUM(entities), 0) FROM rollup_new_entities WHERE hour >= :hour)
+'''
+
+# name -> (sql, sample parameters)
+HOT_QUERIES = {
+    'recent_articles': (RECENT_ARTICLES_SQL, (50,)),
+    'recent_entities': (RECENT_ENTITIES_SQL, (50,)),
+    'articles_since': (ARTICLES_SINCE_SQL, (0, 50)),
+    'articles_by_source': (ARTICLES_BY_SOURCE_SQL, ('OFAC', 50)),
+    'entities_by_name': (ENTITIES_BY_NAME_SQL, ('Iran', 50)),
+    'entities_by_type': (ENTITIES_BY_TYPE_SQL, ('High - Sanction', 50)),
+    'articles_before': (ARTICLES_BEFORE_SQL, (1766016000, 100, 50)),
+    'entities_before': (ENTITIES_BEFORE_SQL, (1766016000, 1766016000, 100, 50)),
+    'watchlist': (WATCHLIST_SQL, (50,)),
+    'watchlist_before': (WATCHLIST_BEFORE_SQL, (1700000000, 1700000000, 100, 50)),
+    'rollup_totals': (ROLLUP_TOTALS_SQL, {'hour': 490000}),
+    'entity_articles': (ENTITY_ARTICLES_SQL, (1, 5)),
+}
+
+def get_recent_articles(limit=50, before=None):
+    """
+    Newest articles first. Pass the (published_at, id) of the last row of a
+    page as `before` to get the next page.
+    """
+    conn = get_db_connection()
+    if before is None:
+        return conn.execute(RECENT_ARTICLES_SQL, (limit,)).fetchall()
+    return conn.execute(ARTICLES_BEFORE_SQL, (*before, limit)).fetchall()
+
+def get_recent_entities(limit=50, before=None):
+    """
+    Newest entity mentions first. `before` is the (published_at, id) of the
+    last row of the previous page.
+    """
+    conn = get_db_connection()
+    if before is None:
+        return conn.execute(RECENT_ENTITIES_SQL, (limit,)).fetchall()
+    published_at, entity_row = before
+    return conn.execute(ENTITIES_BEFORE_SQL, (published_at, published_at, entity_row, limit)).fetchall()
+
+def get_metrics(since=None):
+    """
+    Totals for articles published since `since` (epoch seconds; None = all
+    time), read from the hourly rollups: articles, sources, mentions,
+    high_risk (mentions at High risk level) and new_entities.
+    """
+    conn = get_db_connection()
+    hour = since // 3600 if since is not None else -2 ** 62
+    row = conn.execute(ROLLUP_TOTALS_SQL, {'hour': hour}).fetchone()
+    return dict(zip(('articles', 'sources', 'mentions', 'high_risk', 'new_entities'), row))
+
+def get_daily_mentions(since):
+    """
+    (day as 'YYYY-MM-DD', risk level, mentions) since `since` (epoch seconds),
+    for trend charts.
+    """
+    conn = get_db_connection()
+    return conn.execute('''
+        SELECT date(hour * 3600, 'unixepoch') AS day, risk_level, SUM(mentions) AS mentions
+        FROM rollup_mentions
+        WHERE hour >= ?
+        GROUP BY day, risk_level
+        HAVING SUM(mentions) > 0
+        ORDER BY day
+    ''', (since // 3600,)).fetchall()
+
+def get_daily_articles(since):
+    """
+    (day as 'YYYY-MM-DD', source, articles) since `since` (epoch seconds).
+    """
+    conn = get_db_connection()
+    return conn.execute('''
+        SELECT date(hour * 3600, 'unixepoch') AS day, source, SUM(articles) AS articles
+        FROM rollup_articles
+        WHERE hour >= ?
+        GROUP BY day, source
+        HAVING SUM(articles) > 0
+        ORDER BY day
+    ''', (since // 3600,)).fetchall()
+
+def get_ingest_version():
+    """
+    Changes whenever articles are stored or deleted; cheap enough to poll on
+    every dashboard rerun.
+    """
+    conn = get_db_connection()
+    row = conn.execute('SELECT version FROM ingest_state WHERE id = 1').fetchone()
+    return row[0] if row else 0
+
+def get_articles_by_source(source, limit=50):
+    conn = get_db_connection()
+    return conn.execute(ARTICLES_BY_SOURCE_SQL, (source, limit)).fetchall()
+
+def get_entities_by_name(name, limit=50):
+    """
+    Exact (case-insensitive) name lookup, newest mentions first.
+    """
+    conn = get_db_connection()
+    return conn.execute(ENTITIES_BY_NAME_SQL, (name, limit)).fetchall()
+
+def get_watchlist(limit=50, before=None):
+    """
+    Distinct watchlist entities, most recently seen first.
+    first_seen/last_seen are epoch seconds (UTC). `before` is the
+    (last_seen, id) of the last row of the previous page.
+    """
+    conn = get_db_connection()
+    if before is None:
+        return conn.execute(WATCHLIST_SQL, (limit,)).fetchall()
+    last_seen, entity_id = before
+    return conn.execute(WATCHLIST_BEFORE_SQL, (last_seen, last_seen, entity_id, limit)).fetchall()
+
+def get_entity_aliases(entity_id):
+    conn = get_db_connection()
+    return conn.execute(
+        'SELECT alias, mention_count FROM entity_aliases WHERE entity_id = ? ORDER BY mention_count DESC',
+        (entity_id,)
+    ).fetchall()
+
+def get_entity_articles(entity_id, limit=5):
     conn = get_db_connection()
-    articles = conn.execute('SELECT * FROM articles ORDER BY date DESC LIMIT ?', (limit,)).fetchall()
-    conn.close()
+    return conn.execute(ENTITY_ARTICLES_SQL, (entity_id, limit)).fetchall()
+
+def get_entities_articles(entity_ids, limit=5):
+    """
+    The newest `limit` articles of each entity as {entity_id: [rows]}, using
+    one query per MAX_SQL_VARIABLES ids.
+    """
+    entity_ids = list(set(entity_ids))
+    articles = {entity_id: [] for entity_id in entity_ids}
+    conn = get_db_connection()
+    for i in range(0, len(entity_ids), MAX_SQL_VARIABLES):
+        chunk = entity_ids[i:i + MAX_SQL_VARIABLES]
+        sql = ENTITIES_ARTICLES_SQL.format(placeholders=','.join('?' * len(chunk)))
+        for row in conn.execute(sql, (*chunk, limit)):
+            articles[row['entity_id']].append(row)
     return articles
 
-def get_recent_entities(limit=50):
-    conn = get_db_connection()
-    query = '''
-        SELECT e.name, e.type, a.source, a.date, a.title, a.url 
-        FROM entities e 
-        JOIN articles a ON e.article_id = a.id 
-        ORDER BY a.date DESC 
-        LIMIT ?
-    '''
-    entities = conn.execute(query, (limit,)).fetchall()
-    conn.close()
-    return entities
+def get_entities_by_type(entity_type, limit=50):
+    conn = get_db_connection()
+    return conn.execute(ENTITIES_BY_TYPE_SQL, (entity_type, limit)).fetchall()
+
+def get_checkpoint(source):
+    conn = get_db_connection()
+    return conn.execute(
+        'SELECT source, last_url, last_date, updated_at FROM source_checkpoints WHERE source = ?',
+        (source,)
+    ).fetchone()
+
+def save_checkpoint(source, last_url, last_date):
+    conn = get_db_connection()
+    with conn:
+        conn.execute('''
+            INSERT INTO source_checkpoints (source, last_url, last_date, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(source) DO UPDATE SET
+                last_url = excluded.last_url,
+                last_date = excluded.last_date,
+                updated_at = excluded.updated_at
+        ''', (source, last_url, last_date))
+
+def get_articles_since(epoch, limit=500):
+    """
+    Articles published at or after `epoch` (seconds, UTC), newest first.
+    """
+    conn = get_db_connection()
+    return conn.execute(ARTICLES_SINCE_SQL, (epoch, limit)).fetchall()
+
+# Ranked full-text search. An entity is a hit if its name matches (:name_query,
+# word prefixes) or if the article it was found in matches (:text_query,
+# stemmed words; title weighted over content). Name matches count double.
+# bm25() is lower-is-better.
+# Each FTS table is ranked on its own and cut to the best :window rows (the
+# page end) before anything is joined: every entity appears once per branch
+# and every article has its own entities, so no row of the page can be past
+# that cut. Only rowids >= :min_entity / :min_article are ranked (see
+# SEARCH_MAX_RANKED).
+SEARCH_SQL = '''
+    WITH entity_hits AS (
+        SELECT rowid AS entity_id, 2.0 * rank AS score
+        FROM entities_fts
+        WHERE entities_fts MATCH :name_query AND rowid >= :min_entity
+        ORDER BY rank
+        LIMIT :window
+    ),
+    article_hits AS (
+        SELECT rowid AS article_id, rank AS score
+        FROM articles_fts
+        WHERE articles_fts MATCH :text_query AND rowid >= :min_article AND rank MATCH 'bm25(2.0, 1.0)'
+        ORDER BY rank
+        LIMIT :window
+    ),
+    hits AS (
+        SELECT entity_id, score FROM entity_hits
+        UNION ALL
+        SELECT e.id, h.score FROM article_hits h JOIN entities e ON e.article_id = h.article_id
+    )
+    SELECT e.name, e.type, a.source, a.date, a.title, a.url, MIN(h.score) AS score
+    FROM hits h
+    JOIN entities e ON e.id = h.entity_id
+    JOIN articles a ON a.id = e.article_id
+    GROUP BY e.id
+    ORDER BY score, a.published_at DESC
+    LIMIT :limit OFFSET :offset
+'''
+
+# bm25 is computed for every row a query matches, so a term found in most
+# articles would be ranked across the whole history. Per table, only the
+# newest this-many matches are ranked; a term that common has almost no
+# weight in bm25 anyway, and the rarer terms of the query decide the order.
+SEARCH_MAX_RANKED = 20000
+
+def _rank_floor(conn, table, fts_query):
+    # Lowest rowid among the newest SEARCH_MAX_RANKED matches (0 if fewer match)
+    row = conn.execute(f'SELECT rowid FROM {table} WHERE {table} MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?',
+                       (fts_query, SEARCH_MAX_RANKED - 1)).fetchone()
+    return row[0] if row else 0
+
+def _fts_query(text, prefix=True):
+    """
+    Turns free text from a search box into a safe FTS5 query: every word must
+    match (as a prefix unless prefix=False), and FTS syntax in the input is
+    quoted away.
+    """
+    words = re.findall(r'\w+', text or '')
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' if prefix else f'"{word}"' for word in words)
+
+def search(query, limit=50, offset=0):
+    """
+    Full-text search over entity names (by word prefix) and article titles
+    and content (by stemmed word) across the whole history. Returns (name, type, source, date, title, url, score) rows,
+    best matches first; page through them with limit/offset. Very common
+    terms are only ranked among their newest matches (SEARCH_MAX_RANKED).
+    """
+    name_query = _fts_query(query)
+    if name_query is None:
+        return []
+    text_query = _fts_query(query, prefix=False)
+    conn = get_db_connection()
+    return conn.execute(SEARCH_SQL, {
+        'name_query': name_query, 'text_query': text_query,
+        'limit': limit, 'offset': offset, 'window': limit + offset,
+        'min_entity': _rank_floor(conn, 'entities_fts', name_query),
+        'min_article': _rank_floor(conn, 'articles_fts', text_query),
+    }).fetchall()
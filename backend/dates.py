@@ -0,0 +1,67 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from dateutil import parser as dateutil_parser
+
+def _parse_iso(date_str):
+    # <time datetime="2025-12-19T12:00:00Z"> on DOJ/OFAC/Treasury pages
+    return datetime.fromisoformat(date_str)
+
+def _parse_rfc822(date_str):
+    # RSS <pubDate>, e.g. "Fri, 19 Dec 2025 10:00:00 GMT"
+    dt = parsedate_to_datetime(date_str)
+    if dt is None:
+        raise ValueError(date_str)
+    return dt
+
+def _parse_long(date_str):
+    # Listing text, e.g. "December 19, 2025"
+    return datetime.strptime(date_str, '%B %d, %Y')
+
+# Formats each source is known to publish, most likely first.
+# Anything they can't read falls back to dateutil.
+SOURCE_PARSERS = {
+    'OFAC': (_parse_long, _parse_iso),
+    'US_Treasury': (_parse_iso, _parse_long),
+    'DOJ': (_parse_iso, _parse_rfc822),
+    'DHS': (_parse_rfc822, _parse_iso),
+    'FINTRAC': (_parse_rfc822, _parse_iso),
+    'FATF': (_parse_rfc822, _parse_iso),
+}
+DEFAULT_PARSERS = (_parse_iso, _parse_rfc822, _parse_long)
+
+def parse_date(date_str, source=None):
+    """
+    Parses a source date into a naive UTC datetime, or None if it can't be read.
+    """
+    if not date_str:
+        return None
+    date_str = date_str.strip()
+
+    dt = None
+    for parse in SOURCE_PARSERS.get(source, DEFAULT_PARSERS):
+        try:
+            dt = parse(date_str)
+            break
+        except (ValueError, TypeError, IndexError):
+            continue
+
+    if dt is None:
+        try:
+            # Robust (slow) parsing with dateutil
+            dt = dateutil_parser.parse(date_str)
+        except (ValueError, OverflowError, TypeError):
+            return None
+
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+def to_epoch(date_str, source=None):
+    """
+    Seconds since the epoch (UTC) for a source date, or None.
+    """
+    dt = parse_date(date_str, source)
+    if dt is None:
+        return None
+    return int(dt.replace(tzinfo=timezone.utc).timestamp())
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+# Separate file so cache churn never contends with writes to aml.db
+CACHE_PATH = os.path.join(os.path.dirname(__file__), 'extract_cache.db')
+
+# Entries older than this are treated as misses and purged
+TTL_SECONDS = 30 * 24 * 3600
+
+# Oldest entries are evicted once the cache grows past this size
+MAX_ENTRIES = 50000
+
+# Size is enforced every this many writes rather than on each one
+EVICT_EVERY = 200
+
+_local = threading.local()
+_writes = 0
+_writes_lock = threading.Lock()
+
+def _get_conn():
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.path != CACHE_PATH:
+        conn = sqlite3.connect(CACHE_PATH, timeout=5)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS extractions (
+                key TEXT PRIMARY KEY,
+                entities TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_extractions_created_at ON extractions(created_at)')
+        conn.commit()
+        _local.conn = conn
+        _local.path = CACHE_PATH
+    return conn
+
+def normalize(text):
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+def make_key(text, model, prompt_version):
+    """
+    Content address for one extraction: the normalized text plus everything
+    that changes the answer (model and prompt version).
+    """
+    payload = f"{model}\x1f{prompt_version}\x1f{normalize(text)}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def get(key):
+    """
+    Returns the cached entity list (possibly empty) or None on a miss.
+    """
+    row = _get_conn().execute(
+        'SELECT entities FROM extractions WHERE key = ? AND created_at >= ?',
+        (key, time.time() - TTL_SECONDS)
+    ).fetchone()
+    return json.loads(row[0]) if row else None
+
+def get_many(keys):
+    """
+    Returns {key: entities} for the keys that are cached.
+    """
+    keys = list(set(keys))
+    found = {}
+    conn = _get_conn()
+    cutoff = time.time() - TTL_SECONDS
+    for i in range(0, len(keys), 900):
+        chunk = keys[i:i + 900]
+        placeholders = ','.join('?' * len(chunk))
+        rows = conn.execute(
+            f'SELECT key, entities FROM extractions WHERE key IN ({placeholders}) AND created_at >= ?',
+            (*chunk, cutoff)
+        )
+        found.update((key, json.loads(entities)) for key, entities in rows)
+    return found
+
+def put(key, entities):
+    global _writes
+    conn = _get_conn()
+    with conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO extractions (key, entities, created_at) VALUES (?, ?, ?)',
+            (key, json.dumps(entities), time.time())
+        )
+    with _writes_lock:
+        _writes += 1
+        due = _writes % EVICT_EVERY == 0
+    if due:
+        evict()
+
+def evict():
+    """
+    Drops expired entries, then the oldest ones beyond MAX_ENTRIES.
+    """
+    conn = _get_conn()
+    with conn:
+        conn.execute('DELETE FROM extractions WHERE created_at < ?', (time.time() - TTL_SECONDS,))
+        conn.execute('''
+            DELETE FROM extractions WHERE key IN (
+                SELECT key FROM extractions ORDER BY created_at DESC LIMIT -1 OFFSET ?
+            )
+        ''', (MAX_ENTRIES,))
+
+def clear():
+    conn = _get_conn()
+    with conn:
+        conn.execute('DELETE FROM extractions')
@@ -1,6 +1,11 @@
 import re
 import os
 import json
+import time
+
+from backend import extract_cache
+from backend import metrics
+from backend import resilience
 
 # Try to import Google GenAI library (New SDK)
 try:
@@ -9,92 +14,363 @@ try:
 except ImportError:
     HAS_LLM = False
 
-def extract_with_llm(text):
-    """
-    Uses Google GenAI SDK to extract entities.
-    """
+MODEL = 'gemini-2.0-flash'
+
+# Bump whenever INSTRUCTIONS or the output format change, so cached
+# extractions made with the old prompt are no longer served.
+# 2: drops the [] entries cached for documents a batch answer left out
+PROMPT_VERSION = 2
+
+# Batching: documents are packed into one request until this many (estimated)
+# input tokens are used. Longer documents are always sent on their own.
+BATCH_TOKEN_BUDGET = 6000
+MAX_BATCH_DOCS = 40
+SHORT_DOC_TOKENS = 1000
+CHARS_PER_TOKEN = 4
+
+# Requests per second sent to the API, with bursts of up to LLM_BURST. The
+# rate is halved on 429/503 (waiting out the suggested retry delay) and
+# climbs back as calls succeed, so it settles at what the quota allows.
+LLM_RATE = 4.0
+LLM_BURST = 4
+
+# Retries per request for rate limits, server errors (resilience.RETRY_STATUSES)
+# and dropped connections
+LLM_MAX_RETRIES = 4
+
+# A suggested retry delay longer than this is not waited out
+LLM_MAX_RETRY_DELAY = 120
+
+INSTRUCTIONS = """
+        Analyze the following text from a government press release (AML/Financial Crime context).
+        Identify any individuals, companies, or organizations that are being sanctioned, charged, prosecuted, or identified as involved in financial crimes.
+
+        For each entity, determine a "Risk Level" and "Risk Type":
+        - Risk Level: High, Medium, Low
+        - Risk Type: Sanction, Money Laundering, Fraud, Drug Trafficking, Cybercrime, Terrorist Financing, Accomplice, Prosecuted, Settlement, etc.
+"""
+
+_client = None
+_bucket = resilience.TokenBucket(LLM_RATE, LLM_BURST)
+_breaker = resilience.CircuitBreaker('LLM', threshold=5, reset_timeout=120)
+
+def _get_api_key():
     # Try to get key from file first (User provided)
     key_path = r"c:\Users\phume\Downloads\agent_S21\gemini_api.txt"
     if os.path.exists(key_path):
         with open(key_path, 'r') as f:
-            api_key = f.read().strip()
+            return f.read().strip()
+    return os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")
+
+def _get_client():
+    """
+    Returns a shared GenAI client, or None if the SDK or key is missing.
+    """
+    global _client
+    if _client is None and HAS_LLM:
+        api_key = _get_api_key()
+        if api_key:
+            _client = genai.Client(api_key=api_key)
+    return _client
+
+def _extract_json(raw, pattern):
+    # Robust JSON extraction using regex
+    json_match = re.search(pattern, raw, re.DOTALL)
+    if json_match:
+        json_str = json_match.group(0)
     else:
-        api_key = os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")
+        # Fallback: try to clean raw text
+        json_str = raw.replace('```json', '').replace('```', '').strip()
 
-    if not HAS_LLM or not api_key:
-        return None
-    
     try:
-        client = genai.Client(api_key=api_key)
-        
-        prompt = f"""
-        Analyze the following text from a government press release (AML/Financial Crime context).
-        Identify any individuals, companies, or organizations that are being sanctioned, charged, prosecuted, or identified as involved in financial crimes.
-        
-        For each entity, determine a "Risk Level" and "Risk Type":
-        - Risk Level: High, Medium, Low
-        - Risk Type: Sanction, Money Laundering, Fraud, Drug Trafficking, Cybercrime, Terrorist Financing, Accomplice, Prosecuted, Settlement, etc.
+        return json.loads(json_str)
+    except json.JSONDecodeError:
+        # Last ditch: sometimes it returns single quotes
+        # print(f"  [DEBUG] JSON Parse Failed. Raw: {json_str[:100]}...")
+        return None
+
+def _flatten(items):
+    # Flatten for the simpler app structure (Name | Type/Risk)
+    entities = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        name = item.get('name')
+        risk = f"{item.get('risk_level', 'Unknown')} - {item.get('risk_type', 'General')}"
+        entities.append({
+            'name': name,
+            'type': risk
+        })
+    return entities
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def _error_status(e):
+    """
+    HTTP status of an API error (429, 503, ...), or None for errors that
+    carry none. Only the exception's status attribute is trusted: a number
+    in the message may be anything, e.g. part of the rejected prompt.
+    """
+    # google-genai's APIError calls it `code`, other HTTP clients `status_code`
+    for attr in ('status_code', 'code'):
+        status = getattr(e, attr, None)
+        if isinstance(status, int) and not isinstance(status, bool):
+            return status
+    return None
+
+def _retry_delay(e):
+    # Seconds the API asked us to wait: a Retry-After header, or the
+    # "retryDelay": "27s" Gemini puts in the details of a 429
+    headers = getattr(getattr(e, 'response', None), 'headers', None)
+    if headers:
+        delay = resilience.parse_retry_after(headers.get('Retry-After'))
+        if delay is not None:
+            return delay
+    match = re.search(r"retryDelay['\"]?\s*:\s*['\"]?(\d+(?:\.\d+)?)s", str(e))
+    return float(match.group(1)) if match else None
+
+def _is_transient(e, status):
+    if status is not None:
+        return status in resilience.RETRY_STATUSES
+    # No status: dropped connections and timeouts (requests/httpx/builtin)
+    name = type(e).__name__
+    return 'Timeout' in name or 'Connect' in name
+
+def _generate(client, prompt, kind):
+    """
+    One LLM request through the shared rate limiter, retried with backoff
+    on rate limits and transient errors. Raises
+    resilience.UpstreamUnavailable once the retries are used up or while
+    the API's circuit is open; any other error is raised as is.
+    """
+    _breaker.check()
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        _bucket.acquire()
+        start = time.perf_counter()
+        try:
+            response = client.models.generate_content(
+                model=MODEL,
+                contents=prompt,
+            )
+        except Exception as e:
+            status = _error_status(e)
+            metrics.inc('llm_requests_total', kind=kind, outcome=str(status or 'error'))
+            if not _is_transient(e, status):
+                # The API answered; a bad request says nothing about its health
+                _breaker.record_success()
+                raise
+            delay = _retry_delay(e)
+            if status in resilience.THROTTLE_STATUSES:
+                _bucket.penalize(delay)
+            if attempt == LLM_MAX_RETRIES or (delay or 0) > LLM_MAX_RETRY_DELAY:
+                _breaker.record_failure()
+                raise resilience.UpstreamUnavailable(f"LLM unavailable after {attempt + 1} attempts: {e}") from e
+            reason = str(status or type(e).__name__)
+            metrics.inc('retries_total', target='LLM', reason=reason)
+            if status in resilience.THROTTLE_STATUSES and delay is not None:
+                # The bucket now holds every call back until the delay is over
+                print(f"  [RETRY] LLM {reason} (retry {attempt + 1}/{LLM_MAX_RETRIES} after {delay:.0f}s)")
+                continue
+            delay = delay if delay is not None else resilience.backoff(attempt)
+            print(f"  [RETRY] LLM {reason} (retry {attempt + 1}/{LLM_MAX_RETRIES} in {delay:.1f}s)")
+            time.sleep(delay)
+            continue
+        finally:
+            metrics.observe('llm_request_seconds', time.perf_counter() - start, kind=kind)
+        break
+
+    _bucket.reward()
+    _breaker.record_success()
+    usage = getattr(response, 'usage_metadata', None)
+    prompt_tokens = getattr(usage, 'prompt_token_count', None) or estimate_tokens(prompt)
+    output_tokens = getattr(usage, 'candidates_token_count', None) or estimate_tokens(response.text or '')
+    metrics.observe('llm_tokens', prompt_tokens, buckets=metrics.TOKEN_BUCKETS, kind=kind, direction='prompt')
+    metrics.observe('llm_tokens', output_tokens, buckets=metrics.TOKEN_BUCKETS, kind=kind, direction='output')
+    return response
+
+def extract_with_llm(text):
+    """
+    Uses Google GenAI SDK to extract entities.
+    Returns None if the response can't be used; raises
+    resilience.UpstreamUnavailable if the API stays rate limited or down,
+    so that isn't mistaken for "no entities".
+    """
+    client = _get_client()
+    if client is None:
+        return None
 
+    try:
+        prompt = f"""{INSTRUCTIONS}
         Return strictly a JSON array of objects with keys: "name", "type" (Person/Org), "risk_level", "risk_type".
         Do NOT generic government bodies (e.g. "Department of Justice", "Office of Foreign Assets Control", "District Court") unless they are the specific defendant/target.
-        
+
         Text:
         {text[:8000]}
-        
+
         JSON Response:
         """
-        
+
         # Using gemini-2.5-flash as authenticated by user test
-        response = client.models.generate_content(
-            model='gemini-2.0-flash', 
-            contents=prompt,
-        )
-        
-        # Robust JSON extraction using regex
-        json_match = re.search(r'\[.*\]', response.text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(0)
-        else:
-            # Fallback: try to clean raw text
-            json_str = response.text.replace('```json', '').replace('```', '').strip()
+        response = _generate(client, prompt, 'single')
 
-        try:
-            data = json.loads(json_str)
-        except json.JSONDecodeError:
-            # Last ditch: sometimes it returns single quotes
-            # print(f"  [DEBUG] JSON Parse Failed. Raw: {json_str[:100]}...")
+        data = _extract_json(response.text, r'\[.*\]')
+        # Anything but a list is not an answer; returning None keeps it out of the cache
+        if not isinstance(data, list):
+            metrics.inc('llm_requests_total', kind='single', outcome='unparsable')
             return None
-        
-        # Flatten for the simpler app structure (Name | Type/Risk)
-        entities = []
-        for item in data:
-            name = item.get('name')
-            risk = f"{item.get('risk_level', 'Unknown')} - {item.get('risk_type', 'General')}"
-            entities.append({
-                'name': name,
-                'type': risk
-            })
-        return entities
+        metrics.inc('llm_requests_total', kind='single', outcome='ok')
+        return _flatten(data)
+    except resilience.UpstreamUnavailable:
+        raise
     except Exception as e:
         print(f"LLM Extraction failed: {e}")
         return None
 
+def extract_batch_with_llm(docs):
+    """
+    Extracts entities for several documents in one request.
+    `docs` maps a stable document ID to its text. Returns a dict mapping each
+    ID the model answered to its entity list (ids it left out are absent),
+    or None if the request failed as a whole.
+    """
+    client = _get_client()
+    if client is None:
+        return None
+
+    sections = "\n".join(f"### DOC {doc_id}\n{text}\n" for doc_id, text in docs.items())
+    try:
+        prompt = f"""{INSTRUCTIONS}
+        The input below contains several independent documents, each starting with a "### DOC <id>" header.
+        Return strictly one JSON object mapping every document id to a JSON array of objects with keys: "name", "type" (Person/Org), "risk_level", "risk_type".
+        Use an empty array for documents without such entities. Include every id exactly once.
+        Do NOT generic government bodies (e.g. "Department of Justice", "Office of Foreign Assets Control", "District Court") unless they are the specific defendant/target.
+
+        Documents:
+        {sections}
+
+        JSON Response:
+        """
+
+        response = _generate(client, prompt, 'batch')
+
+        data = _extract_json(response.text, r'\{.*\}')
+        if not isinstance(data, dict):
+            metrics.inc('llm_requests_total', kind='batch', outcome='unparsable')
+            return None
+        metrics.inc('llm_requests_total', kind='batch', outcome='ok')
+        # Only ids the model actually answered: an explicit [] means "no
+        # entities", a missing id means the document was not handled
+        return {doc_id: _flatten(data[str(doc_id)]) for doc_id in docs
+                if isinstance(data.get(str(doc_id)), list)}
+    except resilience.UpstreamUnavailable:
+        raise
+    except Exception as e:
+        print(f"LLM Batch Extraction failed: {e}")
+        return None
+
+def plan_batches(texts, token_budget=BATCH_TOKEN_BUDGET, max_docs=MAX_BATCH_DOCS):
+    """
+    Groups indexes of `texts` into batches that fit the token budget.
+    Long documents get a batch of their own.
+    """
+    batches = []
+    current, used = [], 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if tokens > SHORT_DOC_TOKENS:
+            batches.append([i])
+            continue
+        if current and (used + tokens > token_budget or len(current) >= max_docs):
+            batches.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def extract_entities_batch(texts, token_budget=BATCH_TOKEN_BUDGET):
+    """
+    Batch version of extract_entities: returns one entity list per input text,
+    in input order, or None for a text whose extraction failed. Short texts
+    (e.g. OFAC titles) share a request; if a batch request fails, or its
+    answer leaves documents out, those documents are retried one by one.
+    Cached texts are answered without any request.
+    resilience.UpstreamUnavailable (rate limited or down after retries) is
+    not retried per document; it propagates so the items count as failed.
+    """
+    results = [[] for _ in texts]
+    keys = [_cache_key(text) if text else None for text in texts]
+    cached = extract_cache.get_many(key for key in keys if key)
+
+    pending = []
+    for i, key in enumerate(keys):
+        if key is None:
+            continue
+        if key in cached:
+            results[i] = cached[key]
+        else:
+            pending.append(i)
+    metrics.inc('llm_cache_total', len(keys) - keys.count(None) - len(pending), result='hit')
+    metrics.inc('llm_cache_total', len(pending), result='miss')
+
+    for batch in plan_batches([texts[i] for i in pending], token_budget):
+        batch = [pending[b] for b in batch]
+        if len(batch) == 1:
+            results[batch[0]] = extract_entities(texts[batch[0]])
+            continue
+
+        docs = {f"D{n}": texts[i] for n, i in enumerate(batch)}
+        mapped = extract_batch_with_llm(docs)
+        if mapped is None:
+            print(f"  [WARN] Batch of {len(batch)} failed. Falling back to single requests.")
+            for i in batch:
+                results[i] = extract_entities(texts[i])
+            continue
+
+        missing = []
+        for n, i in enumerate(batch):
+            entities = mapped.get(f"D{n}")
+            if entities is None:
+                missing.append(i)
+                continue
+            results[i] = entities
+            extract_cache.put(keys[i], entities)
+        if missing:
+            print(f"  [WARN] Batch answer left out {len(missing)} of {len(batch)} documents. Requesting them singly.")
+            for i in missing:
+                results[i] = extract_entities(texts[i])
+    return results
+
+def _cache_key(text):
+    return extract_cache.make_key(text, MODEL, PROMPT_VERSION)
+
 def extract_entities(text):
     """
-    Extracts entities using ONLY the LLM. 
-    If LLM fails or is not configured, returns empty list (or raises error if strictly required).
+    Extracts entities using ONLY the LLM.
+    Returns [] if the text has no entities, and None if the LLM failed or
+    is not configured, so the caller can retry the article later instead
+    of treating it as having none.
     User explicitly requested NO REGEX fallback.
     """
     if not text:
         return []
-    
+
+    # 0. Serve repeats (re-runs, identical titles, known no-entity texts) from cache
+    key = _cache_key(text)
+    cached = extract_cache.get(key)
+    if cached is not None:
+        return cached
+
     # 1. Try LLM
     llm_result = extract_with_llm(text)
-    
-    if llm_result:
-        return llm_result
-    
-    # If LLM failed or returned None, do NOT fallback to regex.
-    # Return empty to avoid "shit" data on dashboard.
-    print("  [WARN] LLM extraction returned no results or failed. Skipping entity extraction.")
-    return []
+
+    # Empty results are cached too; only failures (None) are retried next time
+    if llm_result is not None:
+        extract_cache.put(key, llm_result)
+
+    if llm_result is None:
+        # Do NOT fallback to regex; the caller keeps the article for a later run
+        print("  [WARN] LLM extraction failed. Skipping entity extraction.")
+    return llm_result
@@ -0,0 +1,324 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from backend import archive
+from backend import metrics
+from backend import resilience
+
+# Global Headers for WAF Bypass
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Seconds before giving up on a host (a hung host must not stall a worker forever)
+DEFAULT_TIMEOUT = 20
+
+# Politeness: minimum seconds between two requests to the same host.
+# Different hosts are limited independently so sources can run in parallel.
+# A host answering 429/503 is slowed down further (and Retry-After honoured),
+# then brought back up to this pace as requests succeed again.
+HOST_DELAY = 1.0
+HOST_DELAYS = {}
+
+# Retries of one request after a connection error, timeout or RETRY_STATUSES,
+# spaced by exponential backoff with jitter (or the server's Retry-After)
+MAX_RETRIES = 3
+RETRY_STATUSES = resilience.RETRY_STATUSES
+THROTTLE_STATUSES = resilience.THROTTLE_STATUSES
+
+# A Retry-After longer than this is not waited out within the run
+MAX_RETRY_AFTER = 120
+
+# A source whose requests fail this many times in a row (after retries) is
+# paused for BREAKER_RESET seconds; its fetches then fail fast
+BREAKER_THRESHOLD = 5
+BREAKER_RESET = 300
+
+# Connections kept alive per host (one pool per host, shared by all threads)
+POOL_MAXSIZE = 4
+
+# Requests in flight per host at once, however many threads are fetching
+HOST_CONCURRENCY = POOL_MAXSIZE
+
+# Every 200 response is kept in backend/archive for offline re-parsing
+ARCHIVE = True
+
+# Serve every request from the archive instead of the network (updater --replay)
+REPLAY = False
+
+# ETag / Last-Modified per URL, persisted between runs
+VALIDATORS_PATH = os.path.join(os.path.dirname(__file__), 'http_validators.json')
+
+class HostLimiter:
+    """
+    Spaces out requests to a single host by at least `delay` seconds (a
+    token bucket that slows down when the host pushes back) and caps how
+    many are in flight at once.
+    """
+    def __init__(self, delay, max_in_flight=HOST_CONCURRENCY):
+        self.delay = delay
+        self.bucket = resilience.TokenBucket(1 / delay if delay > 0 else None)
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+
+    def wait(self):
+        self.bucket.acquire()
+
+    @contextmanager
+    def slot(self):
+        """
+        Holds one of the host's in-flight slots for the duration of a request.
+        """
+        with self._in_flight:
+            self.wait()
+            yield
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(url):
+    host = urlparse(url).netloc
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = HostLimiter(HOST_DELAYS.get(host, HOST_DELAY))
+            _limiters[host] = limiter
+        return limiter
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name):
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = resilience.CircuitBreaker(name, BREAKER_THRESHOLD, BREAKER_RESET)
+            _breakers[name] = breaker
+        return breaker
+
+def get_session(url):
+    """
+    Returns the keep-alive session for the URL's host, creating it on first use.
+    """
+    host = urlparse(url).netloc
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(HEADERS)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[host] = session
+        return session
+
+_validators = None
+# Validators of pages processed this run, per source, not yet committed
+_pending = {}
+_validators_lock = threading.Lock()
+
+def _load_validators():
+    global _validators
+    if _validators is None:
+        try:
+            with open(VALIDATORS_PATH, 'r') as f:
+                _validators = json.load(f)
+        except (OSError, ValueError):
+            _validators = {}
+    return _validators
+
+def save_validators():
+    """
+    Writes the validator store to disk. Called once at the end of a run.
+    """
+    with _validators_lock:
+        if _validators is None:
+            return
+        tmp_path = VALIDATORS_PATH + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(_validators, f)
+        os.replace(tmp_path, VALIDATORS_PATH)
+
+def remember(response):
+    """
+    Holds the response's ETag/Last-Modified for the next poll's conditional
+    GET. Call it only after the page's items were handed on; they only take
+    effect once commit_validators() is called for the page's source,
+    otherwise a failed page would be skipped as "unchanged" forever.
+    """
+    validators = getattr(response, 'validators', None)
+    if not validators:
+        return
+    with _validators_lock:
+        _pending.setdefault(getattr(response, 'source', None) or 'other', {})[response.request_url] = validators
+
+def commit_validators(skip=()):
+    """
+    Makes the validators remembered this run usable, except those of the
+    sources in `skip` (whose items did not all make it into the database),
+    and forgets the rest. Call it once every item has been stored.
+    """
+    with _validators_lock:
+        pending = dict(_pending)
+        _pending.clear()
+        for source, validators in pending.items():
+            if source not in skip:
+                _load_validators().update(validators)
+
+def is_not_modified(response):
+    return response.status_code == 304
+
+# Per-source transfer stats for the current process
+_stats = {}
+_stats_lock = threading.Lock()
+
+def _record(source, downloaded, saved, not_modified):
+    with _stats_lock:
+        entry = _stats.setdefault(source or 'other', {
+            'requests': 0, 'not_modified': 0, 'bytes_downloaded': 0, 'bytes_saved': 0
+        })
+        entry['requests'] += 1
+        entry['not_modified'] += int(not_modified)
+        entry['bytes_downloaded'] += downloaded
+        entry['bytes_saved'] += saved
+
+def get_stats():
+    with _stats_lock:
+        return {source: dict(entry) for source, entry in _stats.items()}
+
+def print_stats():
+    for source, entry in sorted(get_stats().items()):
+        print(f"  [HTTP] {source}: {entry['requests']} requests, "
+              f"{entry['not_modified']} not modified, "
+              f"{entry['bytes_downloaded'] / 1024:.0f} KB downloaded, "
+              f"{entry['bytes_saved'] / 1024:.0f} KB saved")
+
+def _replayed(url, source):
+    # The newest archived response for the URL; 404 if it was never fetched
+    with metrics.timer('fetch', source or 'other'):
+        entry = archive.lookup(url)
+    response = requests.Response()
+    response.url = url
+    response.request_url = url
+    if entry is None:
+        response.status_code = 404
+        response._content = b''
+    else:
+        response.status_code = entry['status']
+        response._content = entry['body']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+    _record(source, 0, 0, False)
+    metrics.inc('http_responses_total', source=source or 'other', status=str(response.status_code))
+    return response
+
+def _get_with_retries(url, headers, timeout, source):
+    limiter = get_limiter(url)
+    for attempt in range(MAX_RETRIES + 1):
+        last = attempt == MAX_RETRIES
+        queued = time.perf_counter()
+        try:
+            with limiter.slot():
+                metrics.observe('stage_seconds', time.perf_counter() - queued, stage='throttle', source=source)
+                with metrics.timer('fetch', source):
+                    response = get_session(url).get(url, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if last:
+                raise
+            delay = resilience.backoff(attempt)
+            metrics.inc('retries_total', target=source, reason=type(e).__name__)
+            print(f"    [RETRY] {url}: {e.__class__.__name__} (retry {attempt + 1}/{MAX_RETRIES} in {delay:.1f}s)")
+            time.sleep(delay)
+            continue
+
+        response.request_url = url
+        metrics.inc('http_responses_total', source=source, status=str(response.status_code))
+        if response.status_code not in RETRY_STATUSES:
+            limiter.bucket.reward()
+            return response
+
+        retry_after = resilience.parse_retry_after(response.headers.get('Retry-After'))
+        if last or (retry_after or 0) > MAX_RETRY_AFTER:
+            return response
+        metrics.inc('retries_total', target=source, reason=str(response.status_code))
+        if response.status_code in THROTTLE_STATUSES:
+            # Slows every request to the host, not just this one
+            limiter.bucket.penalize(retry_after)
+        if retry_after:
+            print(f"    [RETRY] {url}: {response.status_code}, Retry-After {retry_after:.0f}s")
+            # A throttled host's bucket already holds every request back until then
+            if response.status_code not in THROTTLE_STATUSES or limiter.bucket.max_rate is None:
+                time.sleep(retry_after)
+        else:
+            delay = resilience.backoff(attempt)
+            print(f"    [RETRY] {url}: {response.status_code} (retry {attempt + 1}/{MAX_RETRIES} in {delay:.1f}s)")
+            time.sleep(delay)
+
+def get(url, timeout=DEFAULT_TIMEOUT, source=None, conditional=False):
+    """
+    GET through the host's pooled session with a timeout and per-host rate limiting.
+    With conditional=True, stored validators are sent as If-None-Match /
+    If-Modified-Since; an unchanged resource comes back as a bodyless 304
+    (check with is_not_modified) and its last known size counts as bytes saved.
+    Connection errors, timeouts and RETRY_STATUSES are retried; a source
+    that keeps failing trips its circuit breaker and further calls raise
+    resilience.CircuitOpenError until it is probed again.
+    In REPLAY mode nothing goes over the network.
+    """
+    if REPLAY:
+        return _replayed(url, source)
+
+    breaker = get_breaker(source or urlparse(url).netloc)
+    breaker.check()
+
+    headers = {}
+    known = None
+    if conditional:
+        with _validators_lock:
+            known = _load_validators().get(url)
+        if known:
+            if known.get('etag'):
+                headers['If-None-Match'] = known['etag']
+            if known.get('last_modified'):
+                headers['If-Modified-Since'] = known['last_modified']
+
+    try:
+        response = _get_with_retries(url, headers, timeout, source or 'other')
+    except Exception:
+        breaker.record_failure()
+        raise
+    if response.status_code in RETRY_STATUSES:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    response.source = source
+
+    if response.status_code == 304:
+        _record(source, 0, (known or {}).get('length', 0), True)
+        return response
+
+    _record(source, len(response.content), 0, False)
+    if ARCHIVE and response.status_code == 200:
+        try:
+            archive.store(url, response.status_code, response.headers, response.content)
+        except OSError as e:
+            print(f"  [WARN] Could not archive {url}: {e}")
+    if conditional and response.status_code == 200:
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            response.validators = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'length': len(response.content)
+            }
+    return response
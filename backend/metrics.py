@@ -0,0 +1,233 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# In-process counters and histograms for the updater.
+# Observations are made per request, page, batch or transaction (never per
+# row), and each costs one lock acquisition and a few dict lookups, so
+# leaving this on is cheap. Set ENABLED = False to make every call a no-op.
+ENABLED = True
+
+# Written at the end of every updater run (override with --metrics-json /
+# --metrics-prom). The .prom file is in the Prometheus text format, so a
+# node_exporter textfile collector can pick it up as is.
+SUMMARY_PATH = os.path.join(os.path.dirname(__file__), 'run_metrics.json')
+PROMETHEUS_PATH = os.path.join(os.path.dirname(__file__), 'run_metrics.prom')
+
+# Prefix of every exported metric name
+NAMESPACE = 'aml_updater'
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+# Stages timed per source (see timer). 'throttle' is time spent waiting for
+# the per-host politeness delay before a request, kept apart from 'fetch'.
+STAGES = ('throttle', 'fetch', 'parse', 'dedup', 'extract', 'save')
+
+HELP = {
+    'stage_seconds': 'Wall time spent per pipeline stage and source',
+    'items_total': 'Candidate articles per source and outcome',
+    'http_responses_total': 'HTTP responses per source and status code',
+    'errors_total': 'Errors per source and stage',
+    'llm_request_seconds': 'Latency of LLM requests',
+    'llm_tokens': 'Tokens per LLM request (reported by the API, else estimated)',
+    'llm_requests_total': 'LLM requests per kind and outcome',
+    'llm_cache_total': 'Extraction cache lookups',
+    'retries_total': 'Retried upstream calls per target and reason',
+    'circuit_open_total': 'Times a circuit breaker opened',
+}
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_started_at = time.time()
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+def reset():
+    global _started_at
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _started_at = time.time()
+
+def inc(name, n=1, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + n
+
+def observe(name, value, buckets=SECONDS_BUCKETS, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = {'buckets': buckets, 'counts': [0] * (len(buckets) + 1),
+                                       'count': 0, 'sum': 0.0, 'max': 0.0}
+        hist['counts'][bisect.bisect_left(hist['buckets'], value)] += 1
+        hist['count'] += 1
+        hist['sum'] += value
+        if value > hist['max']:
+            hist['max'] = value
+
+@contextmanager
+def timer(stage, source=None):
+    """
+    Times the block into stage_seconds{stage, source}. The time is recorded
+    even if the block raises.
+    """
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe('stage_seconds', time.perf_counter() - start, stage=stage, source=source or 'all')
+
+def observe_shared(stage, seconds, sources):
+    """
+    Splits the time of one batch (an LLM request, a write transaction) across
+    the sources of its items, in proportion to how many items each had.
+    `sources` has one source name per item.
+    """
+    if not ENABLED or not sources:
+        return
+    counts = {}
+    for source in sources:
+        counts[source] = counts.get(source, 0) + 1
+    for source, n in counts.items():
+        observe('stage_seconds', seconds * n / len(sources), stage=stage, source=source)
+
+def _snapshot():
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: dict(hist, counts=list(hist['counts'])) for key, hist in _histograms.items()}
+    return counters, histograms
+
+def summary():
+    """
+    The run so far as a JSON-serializable dict: counters and histograms by
+    name (one entry per label set), plus a per-source table of stage times
+    and item outcomes.
+    """
+    counters, histograms = _snapshot()
+    result = {
+        'started_at': _started_at,
+        'duration_s': round(time.time() - _started_at, 3),
+        'counters': {},
+        'histograms': {},
+        'sources': {},
+    }
+    for (name, labels), value in sorted(counters.items()):
+        result['counters'].setdefault(name, []).append({'labels': dict(labels), 'value': value})
+    for (name, labels), hist in sorted(histograms.items()):
+        result['histograms'].setdefault(name, []).append({
+            'labels': dict(labels),
+            'count': hist['count'],
+            'sum': round(hist['sum'], 6),
+            'mean': round(hist['sum'] / hist['count'], 6) if hist['count'] else None,
+            'max': round(hist['max'], 6),
+            'buckets': {str(le): n for le, n in zip(hist['buckets'] + ('+Inf',), hist['counts'])},
+        })
+
+    for (name, labels), hist in histograms.items():
+        labels = dict(labels)
+        if name == 'stage_seconds':
+            entry = result['sources'].setdefault(labels['source'], {'stages': {}, 'items': {}})
+            entry['stages'][labels['stage']] = {'count': hist['count'], 'seconds': round(hist['sum'], 3)}
+    for (name, labels), value in counters.items():
+        labels = dict(labels)
+        if name == 'items_total':
+            entry = result['sources'].setdefault(labels['source'], {'stages': {}, 'items': {}})
+            entry['items'][labels['outcome']] = value
+    return result
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+def to_prometheus():
+    """
+    Renders every metric in the Prometheus text exposition format.
+    Counter names already end in _total; histogram buckets are cumulative.
+    """
+    counters, histograms = _snapshot()
+    lines = []
+    by_name = {}
+    for (name, labels), value in counters.items():
+        by_name.setdefault(name, ('counter', []))[1].append((labels, value))
+    for (name, labels), hist in histograms.items():
+        by_name.setdefault(name, ('histogram', []))[1].append((labels, hist))
+
+    for name in sorted(by_name):
+        kind, series = by_name[name]
+        full = f'{NAMESPACE}_{name}'
+        if name in HELP:
+            lines.append(f'# HELP {full} {HELP[name]}')
+        lines.append(f'# TYPE {full} {kind}')
+        for labels, value in sorted(series, key=lambda s: s[0]):
+            if kind == 'counter':
+                lines.append(f'{full}{_format_labels(labels)} {value}')
+                continue
+            cumulative = 0
+            for le, n in zip(value['buckets'] + ('+Inf',), value['counts']):
+                cumulative += n
+                lines.append(f'{full}_bucket{_format_labels(labels, [("le", le)])} {cumulative}')
+            lines.append(f'{full}_sum{_format_labels(labels)} {value["sum"]:.6f}')
+            lines.append(f'{full}_count{_format_labels(labels)} {value["count"]}')
+    return '\n'.join(lines) + '\n'
+
+def _write(path, text):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def write_summary(path=None):
+    _write(path or SUMMARY_PATH, json.dumps(summary(), indent=2))
+
+def write_prometheus(path=None):
+    _write(path or PROMETHEUS_PATH, to_prometheus())
+
+def print_summary():
+    for source, entry in sorted(summary()['sources'].items()):
+        stages = ', '.join(f"{stage} {entry['stages'][stage]['seconds']:.2f}s/{entry['stages'][stage]['count']}"
+                           for stage in STAGES if stage in entry['stages'])
+        items = ', '.join(f'{n} {outcome}' for outcome, n in sorted(entry['items'].items()))
+        print(f"  [METRICS] {source}: {stages or 'no timings'}" + (f" | {items}" if items else ''))
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] == '/summary.json':
+            body, content_type = json.dumps(summary()).encode(), 'application/json'
+        else:
+            body, content_type = to_prometheus().encode(), 'text/plain; version=0.0.4'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def serve(port, host='127.0.0.1'):
+    """
+    Serves /metrics (Prometheus text) and /summary.json from a daemon thread
+    for as long as the process runs. Returns the server (call shutdown() to stop).
+    """
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    return server
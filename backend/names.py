@@ -0,0 +1,24 @@
+import re
+import unicodedata
+
+# Legal-form words that say nothing about who an entity is
+CORPORATE_SUFFIXES = {
+    'inc', 'incorporated', 'llc', 'ltd', 'limited', 'corp', 'corporation', 'co', 'company',
+    'plc', 'llp', 'lp', 'sa', 'ag', 'gmbh', 'bv', 'nv', 'spa', 'srl', 'sarl', 'pte', 'pty',
+    'jsc', 'ojsc', 'pjsc', 'cjsc', 'ooo', 'zao', 'oao', 'fze', 'fzco', 'holdings', 'group',
+}
+
+def normalize_name(name):
+    """
+    Canonical form used for matching and de-duplication: ASCII-folded, lower
+    case, punctuation removed and corporate suffixes dropped.
+    "Banco Nación, S.A." -> "banco nacion".
+    """
+    if not name:
+        return ''
+    text = unicodedata.normalize('NFKD', name)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    tokens = re.findall(r'[a-z0-9]+', text.replace('.', ''))
+    kept = [t for t in tokens if t not in CORPORATE_SUFFIXES]
+    # A name made only of suffixes ("Holdings Ltd") keeps its words
+    return ' '.join(kept or tokens)
@@ -0,0 +1,176 @@
+import queue
+import threading
+import time
+
+from backend import database
+from backend import extractor
+from backend import metrics
+from backend import relevance
+
+# Marks the end of a queue; one is sent per consumer thread
+_DONE = object()
+
+class Pipeline:
+    """
+    Extract and store stages of the updater, connected by bounded queues.
+
+    Fetchers call submit() with candidate articles. A pool of extraction
+    workers sends them to the LLM (grouping whatever is already queued into
+    one batch call), and a single writer thread stores articles with entities
+    in batched transactions. When a queue is full the stage feeding it blocks,
+    so the slowest stage sets the pace instead of memory growing without bound.
+
+    An item is a dict with source, title, url, date, content and text
+    (the text sent for extraction). With replace=True, items whose url is
+    already stored overwrite the stored article.
+    """
+    def __init__(self, extract_workers=4, extract_queue_size=200, write_queue_size=500,
+                 extract_batch_size=20, write_batch_size=50, flush_interval=1.0, replace=False):
+        self.extract_workers = extract_workers
+        self.replace = replace
+        self.extract_batch_size = extract_batch_size
+        self.write_batch_size = write_batch_size
+        self.flush_interval = flush_interval
+        self.extract_queue = queue.Queue(maxsize=extract_queue_size)
+        self.write_queue = queue.Queue(maxsize=write_queue_size)
+        self.stats = {'submitted': 0, 'filtered': 0, 'extracted': 0, 'no_entities': 0, 'saved': 0, 'errors': 0}
+        self._stats_lock = threading.Lock()
+        # Sources with items lost to errors; their checkpoints must not advance
+        self.failed_sources = set()
+        self._threads = []
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def _fail(self, items, stage):
+        self._count('errors', len(items))
+        with self._stats_lock:
+            self.failed_sources.update(item['source'] for item in items)
+        for item in items:
+            metrics.inc('items_total', source=item['source'], outcome='error')
+            metrics.inc('errors_total', source=item['source'], stage=stage)
+
+    def start(self):
+        for i in range(self.extract_workers):
+            thread = threading.Thread(target=self._extract_loop, name=f'extract-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._writer = threading.Thread(target=self._write_loop, name='writer', daemon=True)
+        self._writer.start()
+        return self
+
+    def submit(self, item):
+        """
+        Queues a candidate article for extraction. Blocks while the queue is full.
+        Articles the local relevance check rejects never reach the LLM.
+        """
+        self._count('submitted')
+        metrics.inc('items_total', source=item['source'], outcome='candidate')
+        relevant, score, terms = relevance.check(item)
+        if not relevant:
+            self._count('filtered')
+            metrics.inc('items_total', source=item['source'], outcome='filtered')
+            print(f"    [SKIP - Irrelevant] {item['source']}: {item['title'][:50]}... (score {score}"
+                  + (f": {', '.join(terms[:3])})" if terms else ")"))
+            return
+        self.extract_queue.put(item)
+
+    def close(self):
+        """
+        Waits until every submitted item has been extracted and written.
+        """
+        for _ in self._threads:
+            self.extract_queue.put(_DONE)
+        for thread in self._threads:
+            thread.join()
+        self.write_queue.put(_DONE)
+        self._writer.join()
+        return self.stats
+
+    def _extract_loop(self):
+        done = False
+        while not done:
+            item = self.extract_queue.get()
+            if item is _DONE:
+                break
+
+            # Take whatever else is already waiting so short texts share a request
+            batch = [item]
+            while len(batch) < self.extract_batch_size:
+                try:
+                    nxt = self.extract_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is _DONE:
+                    done = True
+                    break
+                batch.append(nxt)
+
+            start = time.perf_counter()
+            try:
+                results = extractor.extract_entities_batch([i['text'] for i in batch])
+            except Exception as e:
+                print(f"  [ERROR] Extraction of {len(batch)} items failed: {e}")
+                self._fail(batch, 'extract')
+                continue
+            finally:
+                metrics.observe_shared('extract', time.perf_counter() - start, [i['source'] for i in batch])
+
+            failed = [item for item, entities in zip(batch, results) if entities is None]
+            if failed:
+                print(f"  [ERROR] Extraction of {len(failed)} items failed")
+                self._fail(failed, 'extract')
+            self._count('extracted', len(batch) - len(failed))
+            for item, entities in zip(batch, results):
+                if entities is None:
+                    continue
+                # Filter: Only save if entities found
+                if not entities:
+                    self._count('no_entities')
+                    metrics.inc('items_total', source=item['source'], outcome='no_entities')
+                    print(f"    [SKIP - No Risks] {item['source']}: {item['title'][:50]}...")
+                    continue
+                item['entities'] = entities
+                self.write_queue.put(item)
+
+    def _write_loop(self):
+        pending = []
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self.write_queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+
+            if item is not None and item is not _DONE:
+                pending.append(item)
+
+            due = time.monotonic() - last_flush >= self.flush_interval
+            if pending and (item is _DONE or len(pending) >= self.write_batch_size or due):
+                self._flush(pending)
+                pending = []
+                last_flush = time.monotonic()
+            elif due:
+                last_flush = time.monotonic()
+
+            if item is _DONE:
+                break
+        database.close_db_connection()
+
+    def _flush(self, items):
+        start = time.perf_counter()
+        try:
+            saved = set(database.save_articles(items, replace=self.replace))
+        except Exception as e:
+            print(f"  [ERROR] Saving {len(items)} articles failed: {e}")
+            self._fail(items, 'save')
+            return
+        finally:
+            metrics.observe_shared('save', time.perf_counter() - start, [item['source'] for item in items])
+        self._count('saved', len(saved))
+        for item in items:
+            # Already stored (e.g. saved by a concurrent run) counts as a duplicate
+            metrics.inc('items_total', source=item['source'], outcome='new' if item['url'] in saved else 'duplicate')
+            if item['url'] in saved:
+                print(f"  [NEW] {item['source']}: {item['title']} ({len(item['entities'])} entities)")
@@ -0,0 +1,119 @@
+import json
+import os
+import re
+import threading
+import time
+
+# Cheap local relevance check run before an article is sent to the LLM.
+# Each term is a regex with a weight; an article's score is the sum of the
+# weights of the distinct terms found in its title and text, and only
+# articles scoring at least THRESHOLD go on to extraction. Negative weights
+# mark topics that are never financial crime (disaster relief, civil rights).
+# Tune with check_relevance.py, which scores a labelled sample and the
+# stored articles (all of which had entities, so every one should pass).
+ENABLED = True
+THRESHOLD = 2.0
+
+# Terms found in the title count this many times their weight
+TITLE_WEIGHT = 1.5
+
+TERMS = [
+    # Sanctions
+    (r'\bsanction(s|ed|ing)?\b', 3.0),
+    (r'\bdesignat(ed|es|ion|ions)\b', 2.0),
+    (r'\bOFAC\b|\bForeign Assets Control\b', 3.0),
+    (r'\bSDN\b|\bSpecially Designated\b', 3.0),
+    (r'\bsanctions? evasion\b|\bevad(e|ed|ing) sanctions\b|\bexport control', 3.0),
+    (r'\bIEEPA\b|\bInternational Emergency Economic Powers\b', 3.0),
+    (r'\bgeneral licen[cs]e\b', 1.0),
+    # Money laundering and reporting
+    (r'\blaunder(ing|ed|s|er|ers)?\b', 4.0),
+    (r'\bBank Secrecy Act\b|\bBSA\b|\bFinCEN\b|\bFINTRAC\b', 3.0),
+    (r'\banti-money\b|\bAML\b|\bproceeds of crime\b', 3.0),
+    (r'\bunlicensed money transmitting\b|\bmoney (services|transmitt\w*)\b|\bhawala\b', 3.0),
+    (r'\bstructuring\b|\bshell compan(y|ies)\b|\bfront compan(y|ies)\b', 2.0),
+    (r'\bforfeit(ure|ed)?\b|\bseiz(ed|ure)\b', 1.5),
+    # Financial crime
+    (r'\bfraud(ulent|ulently|ster|sters)?\b', 2.5),
+    (r'\bponzi\b|\bpyramid scheme\b|\binvestment scheme\b', 3.0),
+    (r'\bembezzl\w*\b|\bmisappropriat\w*\b', 3.0),
+    (r'\bbrib(e|es|ery|ed)\b|\bkickbacks?\b|\bcorrupt(ion)?\b|\bFCPA\b', 3.0),
+    (r'\btax evasion\b|\btax fraud\b|\bfalse tax returns?\b', 2.5),
+    (r'\bterroris[mt]\w* financ\w*\b|\bfinanc\w* (of )?terroris\w*\b|\bmaterial support\b', 4.0),
+    (r'\b(drug|narcotics?) traffick\w*\b|\bcartels?\b|\bfentanyl\b', 2.0),
+    (r'\bcybercrim\w*\b|\bransomware\b|\bdarknet\b|\bcrypto(currenc(y|ies))?\b|\bvirtual currenc(y|ies)\b', 1.5),
+    (r'\bwire fraud\b|\bbank fraud\b|\bsecurities fraud\b|\bhealth care fraud\b', 2.0),
+    (r'\bsettle(d|s|ment)?\b|\bcivil (monetary )?penalt(y|ies)\b|\bconsent order\b', 1.5),
+    (r'\bFalse Claims Act\b', 2.0),
+    (r'\bsmuggl\w*\b|\bevasion\b', 1.5),
+    (r'\bfinancial (crimes?|institutions?)\b', 1.0),
+    # Enforcement vocabulary; weak on its own, decisive next to the above
+    (r'\b(indicted|indictment|charged|convicted|pleads? guilty|pleaded guilty|sentenced)\b', 1.0),
+    (r'\bconspira(cy|cies|tors?)\b', 1.0),
+    # Topics that are not financial crime
+    (r'\b(hurricane|wildfire|flood(ing)?|tornado|earthquake|disaster)\b', -2.0),
+    (r'\bFEMA\b|\bCoast Guard\b|\bTSA\b', -1.5),
+    (r'\bcivil rights\b|\bvoting rights\b|\bhate crimes?\b|\bAmericans with Disabilities Act\b', -2.0),
+    (r'\b(appoint(ed|s|ment)|swearing-in|sworn in|nominat(ed|ion))\b', -1.0),
+]
+
+# Sources whose every item is an enforcement action are never filtered
+ALWAYS_RELEVANT = {'OFAC', 'FINTRAC'}
+
+# Every decision is appended here as one JSON line, for tuning the terms.
+# Once it grows past MAX_LOG_BYTES it is moved to LOG_PATH + '.1' (replacing
+# the previous one) and a new log is started.
+LOG_PATH = os.path.join(os.path.dirname(__file__), 'relevance_log.jsonl')
+MAX_LOG_BYTES = 5 * 1024 * 1024
+
+_patterns = [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in TERMS]
+_log_lock = threading.Lock()
+
+def score(title, text=''):
+    """
+    Relevance score of an article and the terms that matched, as
+    (score, [matched text, ...]) with the highest-weighted terms first.
+    """
+    total = 0.0
+    hits = []
+    for pattern, weight in _patterns:
+        in_title = pattern.search(title or '')
+        match = in_title or pattern.search(text or '')
+        if match:
+            total += weight * (TITLE_WEIGHT if in_title else 1.0)
+            hits.append((weight, match.group(0).lower()))
+    hits.sort(key=lambda hit: -abs(hit[0]))
+    return round(total, 2), [term for _, term in hits]
+
+def check(item, threshold=None):
+    """
+    Decides whether a candidate article goes to the LLM. Returns
+    (relevant, score, terms) and logs the decision.
+    """
+    threshold = THRESHOLD if threshold is None else threshold
+    if not ENABLED or item['source'] in ALWAYS_RELEVANT:
+        return True, None, []
+    value, terms = score(item['title'], item.get('text'))
+    relevant = value >= threshold
+    _log(item, relevant, value, terms, threshold)
+    return relevant, value, terms
+
+def _log(item, relevant, value, terms, threshold):
+    entry = {
+        'at': int(time.time()),
+        'source': item['source'],
+        'url': item['url'],
+        'title': item['title'],
+        'score': value,
+        'threshold': threshold,
+        'relevant': relevant,
+        'terms': terms,
+    }
+    try:
+        with _log_lock:
+            if os.path.exists(LOG_PATH) and os.path.getsize(LOG_PATH) >= MAX_LOG_BYTES:
+                os.replace(LOG_PATH, LOG_PATH + '.1')
+            with open(LOG_PATH, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+    except OSError:
+        pass
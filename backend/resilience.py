@@ -0,0 +1,170 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from backend import metrics
+
+# Shared failure handling for everything the updater calls upstream (source
+# hosts through http_client, Gemini through extractor):
+#   TokenBucket     adaptive rate limit that slows down on 429/503
+#   backoff         exponential backoff with full jitter between retries
+#   CircuitBreaker  fails fast once an upstream keeps failing, then probes it
+
+# HTTP statuses worth retrying, for source hosts and the LLM API alike;
+# THROTTLE_STATUSES also slow the caller's TokenBucket down
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+THROTTLE_STATUSES = frozenset({429, 503})
+
+# Each success raises a throttled rate by this share of its ceiling
+RECOVERY_STEP = 0.1
+
+# A throttled rate never drops below this share of its ceiling
+MIN_RATE_SHARE = 1 / 8
+
+class UpstreamUnavailable(Exception):
+    """
+    An upstream kept failing after every retry, or its circuit is open.
+    """
+
+class CircuitOpenError(UpstreamUnavailable):
+    pass
+
+class TokenBucket:
+    """
+    Allows `rate` acquisitions per second on average with bursts of up to
+    `burst`. penalize() halves the rate (and optionally blocks everyone
+    until a Retry-After has passed); reward() moves it back towards the
+    configured ceiling, so the limit settles just below what the upstream
+    tolerates. A rate of None means unlimited.
+    Thread-safe: callers reserve a token under the lock and sleep outside it.
+    """
+    def __init__(self, rate, burst=1):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._penalized_at = float('-inf')
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        # _updated is in the future while a Retry-After block is in force
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def acquire(self):
+        """
+        Takes one token, sleeping until it is available. Returns the seconds waited.
+        """
+        if self.max_rate is None:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            wait = max(self._blocked_until - now, 0.0) + max(-self._tokens / self.rate, 0.0)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def penalize(self, retry_after=None):
+        if self.max_rate is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Calls that were already in flight fail together; that is one
+            # signal, so the rate is cut at most once per interval
+            if now - self._penalized_at >= 1 / self.rate:
+                self.rate = max(self.rate / 2, self.max_rate * MIN_RATE_SHARE)
+                self._penalized_at = now
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+                # Nothing accrues while blocked: start from an empty bucket
+                self._tokens = min(self._tokens, 0.0)
+                self._updated = max(self._updated, self._blocked_until)
+
+    def reward(self):
+        if self.max_rate is None or self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_STEP)
+
+def backoff(attempt, base=0.5, cap=30.0):
+    """
+    Seconds to wait before retry number `attempt` (0-based): uniformly random
+    up to base * 2^attempt ("full jitter"), so concurrent callers that failed
+    together don't retry together.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def parse_retry_after(value):
+    """
+    Seconds from a Retry-After header (delta-seconds or an HTTP date),
+    or None if it is missing or malformed.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures: allow() then returns False
+    for `reset_timeout` seconds, so a dead upstream costs one quick check
+    per call instead of a full round of retries. After that a single trial
+    call is let through (half-open); its success closes the circuit, its
+    failure opens it again.
+    """
+    def __init__(self, name, threshold=5, reset_timeout=300):
+        self.name = name
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                print(f"  [CIRCUIT] {self.name}: trying again")
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != 'closed':
+                print(f"  [CIRCUIT] {self.name}: closed")
+            self.state = 'closed'
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == 'half_open' or (self.state == 'closed' and self._failures >= self.threshold):
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+                metrics.inc('circuit_open_total', breaker=self.name)
+                print(f"  [CIRCUIT] {self.name}: open after {self._failures} failures, "
+                      f"pausing for {self.reset_timeout}s")
+
+    def check(self):
+        """
+        Raises CircuitOpenError unless a call is allowed right now.
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} is failing; circuit open")
@@ -0,0 +1,125 @@
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+# lxml is several times faster than the stdlib parser; fall back if missing
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Declarative listing scrapers, keyed by source name. The engine
+# (updater.fetch_listing) only knows these fields:
+#   url             listing URL to use instead of the source's own (optional)
+#   scope           SoupStrainer arguments: only these subtrees are parsed
+#   rows            CSS selector for one listing row (within the scope)
+#   link            selector for the row's <a>; its text is the title
+#   date            selector for the row's date element (datetime attr or text)
+#   date_pattern    regex tried on the row text when there is no date element
+#   body            selector for a summary inside the row
+#   content         what is stored and sent to the LLM:
+#                     'title'  the title alone (short, batches well)
+#                     'body'   the row summary, sent as "title. summary"
+#                     'detail' the body of the linked detail page
+#   detail_scope    SoupStrainer arguments for the detail page
+#   detail_body     selector for the body on the detail page
+#   page_param      query parameter for the page number (page 0 has none)
+#   historic_pages  page limit for --historic backfills
+SPECS = {
+    'OFAC': {
+        'scope': {'class_': 'views-row'},
+        'rows': '.views-row',
+        'link': 'a',
+        'date': 'time',
+        # e.g. "January 14, 2026"
+        'date_pattern': r'([A-Z][a-z]+ \d{1,2}, \d{4})',
+        'content': 'title',
+        'page_param': 'page',
+        'historic_pages': 150,
+    },
+    'US_Treasury': {
+        'scope': {'class_': 'views-row'},
+        'rows': '.views-row',
+        'link': 'h3 a',
+        'date': 'time',
+        'content': 'detail',
+        'detail_scope': {'name': 'div', 'class_': 'field-item'},
+        'detail_body': 'div.field-item',
+        'page_param': 'page',
+        'historic_pages': 150,
+    },
+    'DOJ': {
+        'url': 'https://www.justice.gov/news',
+        'scope': {'class_': 'views-row'},
+        'rows': '.views-row',
+        'link': '.views-field-title a',
+        'date': '.views-field-created time',
+        'body': '.views-field-body',
+        'content': 'body',
+        'page_param': 'page',
+        'historic_pages': 20,
+    },
+}
+
+def parse(markup, scope=None):
+    """
+    Parses only the subtrees matching `scope` (SoupStrainer arguments), or
+    the whole document without one.
+    """
+    parse_only = SoupStrainer(**scope) if scope else None
+    try:
+        return BeautifulSoup(markup, HTML_PARSER, parse_only=parse_only)
+    except Exception:
+        # A page the fast parser chokes on gets the forgiving one
+        return BeautifulSoup(markup, 'html.parser', parse_only=parse_only)
+
+def page_url(url, spec, page):
+    if page == 0:
+        return url
+    separator = '&' if '?' in url else '?'
+    return f"{url}{separator}{spec['page_param']}={page}"
+
+def parse_rows(markup, spec):
+    """
+    Listing rows as dicts with title, href, date (text or None) and body
+    (or None). Rows without a link are dropped.
+    """
+    soup = parse(markup, spec.get('scope'))
+    rows = []
+    for row in soup.select(spec['rows']):
+        link_el = row.select_one(spec['link'])
+        if not link_el or not link_el.get('href'):
+            continue
+
+        date_text = None
+        date_el = row.select_one(spec['date']) if spec.get('date') else None
+        if date_el:
+            date_text = date_el.get('datetime') or date_el.get_text(strip=True)
+        if not date_text and spec.get('date_pattern'):
+            date_match = re.search(spec['date_pattern'], row.get_text(" ", strip=True))
+            if date_match:
+                date_text = date_match.group(1)
+
+        body = None
+        if spec.get('body'):
+            body_el = row.select_one(spec['body'])
+            body = body_el.get_text(" ", strip=True) if body_el else None
+
+        rows.append({
+            'title': link_el.get_text(" ", strip=True),
+            'href': link_el['href'],
+            'date': date_text or None,
+            'body': body,
+        })
+    return rows
+
+def parse_detail(markup, spec):
+    """
+    The article body from a detail page, or None if the selector finds nothing.
+    """
+    soup = parse(markup, spec.get('detail_scope'))
+    body_el = soup.select_one(spec['detail_body'])
+    if body_el is None:
+        return None
+    return body_el.get_text(" ", strip=True) or None
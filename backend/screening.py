@@ -0,0 +1,188 @@
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+import numpy as np
+
+from backend import database
+from backend.names import normalize_name
+
+# Candidates kept from the trigram stage for exact re-scoring
+CANDIDATES = 50
+
+# Final score = DICE_WEIGHT * trigram Dice + rest * max(Jaro-Winkler, token-set)
+DICE_WEIGHT = 0.4
+
+def trigrams(normalized):
+    padded = f'  {normalized} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def jaro_winkler(a, b, prefix_scale=0.1):
+    if a == b:
+        return 1.0
+    len_a, len_b = len(a), len(b)
+    if not len_a or not len_b:
+        return 0.0
+    window = max(max(len_a, len_b) // 2 - 1, 0)
+    matched_b = [False] * len_b
+    matches_a = []
+    for i, ch in enumerate(a):
+        lo, hi = max(0, i - window), min(len_b, i + window + 1)
+        for j in range(lo, hi):
+            if not matched_b[j] and b[j] == ch:
+                matched_b[j] = True
+                matches_a.append(ch)
+                break
+    m = len(matches_a)
+    if not m:
+        return 0.0
+    matches_b = [b[j] for j in range(len_b) if matched_b[j]]
+    transpositions = sum(x != y for x, y in zip(matches_a, matches_b)) / 2
+    jaro = (m / len_a + m / len_b + (m - transpositions) / m) / 3
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * prefix_scale * (1 - jaro)
+
+def token_set_ratio(a, b):
+    """
+    Similarity that ignores word order and extra words on one side
+    ("ivan petrov" vs "petrov ivan sergeyevich").
+    """
+    tokens_a, tokens_b = set(a.split()), set(b.split())
+    common = ' '.join(sorted(tokens_a & tokens_b))
+    rest_a = ' '.join(sorted(tokens_a - tokens_b))
+    rest_b = ' '.join(sorted(tokens_b - tokens_a))
+    full_a = f'{common} {rest_a}'.strip()
+    full_b = f'{common} {rest_b}'.strip()
+
+    def ratio(x, y):
+        return SequenceMatcher(None, x, y).ratio() if x and y else 0.0
+
+    if not common:
+        return ratio(full_a, full_b)
+    return max(ratio(common, full_a), ratio(common, full_b), ratio(full_a, full_b))
+
+class ScreeningIndex:
+    """
+    In-memory blocking index over watchlist names.
+
+    Names are normalized and split into character trigrams. Postings are
+    stored CSR-style in two flat numpy arrays, so a query counts shared
+    trigrams for every name at once (np.bincount) and only the best
+    CANDIDATES are re-scored with Jaro-Winkler and token-set similarity.
+    The postings live in a few flat numpy arrays, which pickle quickly and
+    stay shared with forked worker processes.
+    """
+    def __init__(self, names, records):
+        # names[i] is a normalized name; records[i] = (display name, types, entity id, mentions)
+        self.names = names
+        self.records = records
+
+        postings = defaultdict(list)
+        gram_counts = np.zeros(len(names), dtype=np.int32)
+        for name_id, name in enumerate(names):
+            grams = trigrams(name)
+            gram_counts[name_id] = len(grams)
+            for gram in grams:
+                postings[gram].append(name_id)
+
+        self.gram_ids = {}
+        offsets = [0]
+        flat = []
+        for gram_id, (gram, ids) in enumerate(postings.items()):
+            self.gram_ids[gram] = gram_id
+            flat.extend(ids)
+            offsets.append(len(flat))
+        self.postings = np.asarray(flat, dtype=np.int32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.gram_counts = gram_counts
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_db(cls):
+        """
+        Builds the index from the canonical entity table: one entry per
+        distinct actor, with every risk type it has been mentioned under.
+        """
+        conn = database.get_db_connection()
+        types = defaultdict(set)
+        for entity_id, entity_type in conn.execute('SELECT DISTINCT entity_id, type FROM entity_mentions'):
+            if entity_type:
+                types[entity_id].add(entity_type)
+
+        names, records = [], []
+        for row in conn.execute(
+            'SELECT id, norm_name, name, mention_count FROM canonical_entities WHERE mention_count > 0'
+        ):
+            names.append(row['norm_name'])
+            records.append((row['name'], sorted(types[row['id']]), row['id'], row['mention_count']))
+        return cls(names, records)
+
+    def candidates(self, normalized, limit=CANDIDATES):
+        """
+        Name ids ranked by trigram Dice coefficient, with their Dice scores.
+        """
+        gram_ids = [self.gram_ids[g] for g in trigrams(normalized) if g in self.gram_ids]
+        if not gram_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        hits = np.concatenate([self.postings[self.offsets[g]:self.offsets[g + 1]] for g in gram_ids])
+        shared = np.bincount(hits, minlength=len(self.names))
+        ids = np.flatnonzero(shared)
+        dice = 2.0 * shared[ids] / (len(trigrams(normalized)) + self.gram_counts[ids])
+        if len(ids) > limit:
+            top = np.argpartition(-dice, limit)[:limit]
+            ids, dice = ids[top], dice[top]
+        return ids, dice
+
+    def query(self, name, k=10, min_score=0.75):
+        """
+        Top-k watchlist hits for one name as dicts with name, matched
+        (normalized) name, score in [0, 1], types, entity_id and mentions.
+        """
+        normalized = normalize_name(name)
+        if not normalized:
+            return []
+        ids, dice = self.candidates(normalized)
+
+        hits = []
+        for name_id, dice_score in zip(ids.tolist(), dice.tolist()):
+            candidate = self.names[name_id]
+            fine = max(jaro_winkler(normalized, candidate), token_set_ratio(normalized, candidate))
+            score = DICE_WEIGHT * dice_score + (1 - DICE_WEIGHT) * fine
+            if score >= min_score:
+                display, types, entity_id, mentions = self.records[name_id]
+                hits.append({
+                    'name': display,
+                    'matched': candidate,
+                    'score': round(score, 4),
+                    'types': types,
+                    'entity_id': entity_id,
+                    'mentions': mentions,
+                })
+        hits.sort(key=lambda hit: hit['score'], reverse=True)
+        return hits[:k]
+
+def attach_articles(hits, per_hit=5):
+    """
+    Adds the newest source articles (source, date, title, url) behind each hit.
+    """
+    articles = database.get_entities_articles([hit['entity_id'] for hit in hits], limit=per_hit)
+    for hit in hits:
+        hit['articles'] = [
+            {'source': row['source'], 'date': row['date'], 'title': row['title'], 'url': row['url']}
+            for row in articles[hit['entity_id']]
+        ]
+    return hits
+
+def screen(name, k=10, min_score=0.75, index=None):
+    """
+    Screens one name against the watchlist in aml.db. Pass a prebuilt
+    ScreeningIndex to avoid rebuilding it for every call.
+    """
+    if index is None:
+        index = ScreeningIndex.from_db()
+    return attach_articles(index.query(name, k=k, min_score=min_score))
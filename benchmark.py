@@ -0,0 +1,514 @@
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import resource
+except ImportError:
+    # Windows: peak RSS is not reported
+    resource = None
+
+from backend import archive, database, extract_cache, extractor, http_client, metrics, relevance, scrapers
+
+# Offline benchmark for the updater pipeline and the database read path.
+#
+#   python benchmark.py                        # everything, default sizes
+#   python benchmark.py --sizes 10k --skip-updater
+#   python benchmark.py --llm-latency 0.2 --llm-failure-rate 0.1
+#   python benchmark.py --skip-updater --budget-ms 0   # report only, never fail
+#
+# Nothing touches the network or the real aml.db: sources are served by a
+# local fixture server, Gemini is replaced by FakeLLM, and every database,
+# cache and archive path points into a scratch directory. Results go to a
+# JSON file so runs can be diffed.
+
+DEFAULT_OUTPUT = 'bench_results.json'
+DEFAULT_SIZES = '10k,100k,1m'
+
+# Synthetic datasets are reused between runs (building 1M entities takes minutes)
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), 'aml_bench_data')
+
+# Latency budget per read function: the run exits with status 1 if any
+# function's p95 is above it at any dataset size. Functions not listed get
+# DEFAULT_BUDGET_MS (override with --budget-ms, 0 to only report).
+DEFAULT_BUDGET_MS = 50
+BUDGETS_MS = {
+    'get_daily_mentions_30d': 100,
+    'search': 250,
+}
+
+# ---------------------------------------------------------------------------
+# Fixture server
+# ---------------------------------------------------------------------------
+
+# Page chrome around the listing rows, so parsing cost resembles the real sites
+CHROME_HEAD = ('<html><head>' + '<script>window.x = {};</script>' * 20 +
+               '<link rel="stylesheet" href="/s.css"></head><body><header><nav><ul>' +
+               ''.join(f'<li><a href="/menu/{i}">Menu item {i}</a></li>' for i in range(150)) +
+               '</ul></nav></header><main><div class="view-content">')
+CHROME_TAIL = ('</div></main><footer>' +
+               ''.join(f'<p><a href="/f/{i}">Footer link {i}</a> Lorem ipsum dolor sit amet.</p>' for i in range(60)) +
+               '</footer></body></html>')
+
+FIRST_NAMES = ['Ivan', 'Maria', 'Chen', 'Ahmed', 'Olga', 'Juan', 'Fatima', 'Luca', 'Anna', 'Omar']
+LAST_NAMES = ['Petrov', 'Garcia', 'Wei', 'Hassan', 'Ivanova', 'Lopez', 'Khan', 'Rossi', 'Smirnova', 'Aziz']
+COMPANIES = ['Holdings', 'Trading', 'Shipping', 'Capital', 'Energy', 'Logistics', 'Metals', 'Exchange']
+RISKS = ['High - Sanction', 'High - Money Laundering', 'Medium - Fraud', 'Low - Accomplice', 'Medium - Settlement']
+
+def _row_date(page, row, rows_per_page):
+    # Newest first, one article every few hours, always after the historic cutoff
+    return datetime(2026, 1, 1) - timedelta(hours=3 * (page * rows_per_page + row))
+
+class FixtureServer:
+    """
+    Serves OFAC/Treasury/DOJ-style paginated listings, Treasury detail pages
+    and RSS feeds on localhost. Pages past `pages` are empty, which ends a
+    listing like on the real sites.
+    """
+    def __init__(self, pages=10, rows_per_page=20, latency=0.0):
+        self.pages = pages
+        self.rows_per_page = rows_per_page
+        self.latency = latency
+        self.requests = {'listing': 0, 'detail': 0, 'rss': 0}
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                status, body, content_type = server.render(self.path)
+                if server.latency:
+                    time.sleep(server.latency)
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self._httpd.server_address[1]}'
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _count(self, kind):
+        with self._lock:
+            self.requests[kind] += 1
+
+    def render(self, path):
+        parsed = urlparse(path)
+        page = int(parse_qs(parsed.query).get('page', ['0'])[0])
+        kind = parsed.path.strip('/').split('/')[0]
+        if kind in ('ofac', 'treasury', 'doj'):
+            self._count('listing')
+            rows = '' if page >= self.pages else ''.join(
+                getattr(self, f'_{kind}_row')(page, i) for i in range(self.rows_per_page))
+            return 200, (CHROME_HEAD + rows + CHROME_TAIL).encode(), 'text/html'
+        if kind == 'detail':
+            self._count('detail')
+            slug = parsed.path.rsplit('/', 1)[-1]
+            body = (f'<div class="field-item"><p>The Treasury Department today sanctioned {slug} '
+                    f'Trading LLC and its director for laundering proceeds.</p>' + '<p>Background paragraph.</p>' * 15 + '</div>')
+            return 200, (CHROME_HEAD + body + CHROME_TAIL).encode(), 'text/html'
+        if kind == 'rss':
+            self._count('rss')
+            name = parsed.path.rsplit('/', 1)[-1]
+            # Every third item is off-topic (disaster relief) and should be filtered before the LLM
+            items = ''.join(
+                f'<item><title>{name} release {i}</title><link>{self.url}/rss-item/{name}/{i}</link>'
+                + (f'<description>Disaster assistance announced for hurricane victims ({i}).</description>' if i % 3 == 2 else
+                   f'<description>Individual charged with fraud in case {i}.</description>') +
+                f'<pubDate>{_row_date(0, i, 1):%a, %d %b %Y %H:%M:%S} GMT</pubDate></item>'
+                for i in range(self.rows_per_page))
+            return 200, f'<?xml version="1.0"?><rss><channel><title>{name}</title>{items}</channel></rss>'.encode(), 'application/rss+xml'
+        return 404, b'', 'text/plain'
+
+    def _ofac_row(self, page, i):
+        date = _row_date(page, i, self.rows_per_page)
+        return (f'<div class="views-row"><div class="date"><time datetime="{date:%Y-%m-%dT%H:%M:%SZ}">{date:%B %d, %Y}</time></div>'
+                f'<a href="/ofac/recent-actions/{page}-{i}">Russia-related Designations {page}-{i}</a></div>')
+
+    def _treasury_row(self, page, i):
+        date = _row_date(page, i, self.rows_per_page)
+        return (f'<div class="views-row"><time datetime="{date:%Y-%m-%dT%H:%M:%SZ}">{date:%B %d, %Y}</time>'
+                f'<h3 class="field-content"><a href="/detail/sb{page:04d}{i:03d}">Treasury Sanctions Network {page}-{i}</a></h3></div>')
+
+    def _doj_row(self, page, i):
+        date = _row_date(page, i, self.rows_per_page)
+        # Every fourth release is a civil-rights case with nothing to extract
+        body = ('The Justice Department resolved a civil rights complaint against a school district.' if i % 4 == 3 else
+                'Defendant laundered $2 million through shell companies.')
+        return (f'<div class="views-row"><div class="views-field-title"><a href="/doj/news/{page}-{i}">Man Sentenced in Scheme {page}-{i}</a></div>'
+                f'<div class="views-field-created"><time datetime="{date:%Y-%m-%dT%H:%M:%SZ}">{date:%B %d, %Y}</time></div>'
+                f'<div class="views-field-body">{body}</div></div>')
+
+# ---------------------------------------------------------------------------
+# Fake LLM backend
+# ---------------------------------------------------------------------------
+
+class SimulatedAPIError(Exception):
+    """
+    Stands in for the SDK's APIError, which carries the HTTP status as `code`.
+    """
+    def __init__(self, code, message):
+        super().__init__(f'{code} {message}')
+        self.code = code
+
+class FakeLLM:
+    """
+    Stands in for the genai client (extractor._client). Each call sleeps
+    `latency` seconds and fails with probability `failure_rate`; successful
+    calls answer in the same JSON shapes Gemini is asked for.
+    """
+    def __init__(self, latency=0.05, failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self.failures = 0
+        self.prompt_tokens = 0
+        self.latencies = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.models = self
+
+    @staticmethod
+    def _entities(text):
+        digest = int(hashlib.sha1(text.encode('utf-8')).hexdigest(), 16)
+        return [{
+            'name': f"{FIRST_NAMES[digest % 10]} {LAST_NAMES[(digest // 10) % 10]}",
+            'type': 'Person', 'risk_level': 'High', 'risk_type': 'Sanction',
+        }]
+
+    def generate_content(self, model, contents, **kwargs):
+        start = time.perf_counter()
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += extractor.estimate_tokens(contents)
+            failed = self._random.random() < self.failure_rate
+            self.failures += int(failed)
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.latencies.append(time.perf_counter() - start)
+        if failed:
+            raise SimulatedAPIError(503, 'UNAVAILABLE (simulated)')
+
+        docs = re.findall(r'### DOC (\S+)\n(.*?)(?=\n### DOC |\n\s*JSON Response:)', contents, re.DOTALL)
+        if docs:
+            text = json.dumps({doc_id: self._entities(body) for doc_id, body in docs})
+        else:
+            text = json.dumps(self._entities(contents))
+        return type('Response', (), {'text': text})()
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def percentiles(samples):
+    samples = sorted(samples)
+    def pick(q):
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+    return {
+        'p50_ms': round(pick(0.50) * 1000, 3),
+        'p95_ms': round(pick(0.95) * 1000, 3),
+        'p99_ms': round(pick(0.99) * 1000, 3),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3),
+    }
+
+def parse_size(text):
+    text = text.strip().lower()
+    for suffix, factor in (('k', 1000), ('m', 1000000)):
+        if text.endswith(suffix):
+            return int(float(text[:-1]) * factor)
+    return int(text)
+
+def _use_paths(work_dir):
+    database.close_db_connection()
+    database.DB_PATH = os.path.join(work_dir, 'aml.db')
+    extract_cache.CACHE_PATH = os.path.join(work_dir, 'extract_cache.db')
+    http_client.VALIDATORS_PATH = os.path.join(work_dir, 'http_validators.json')
+    archive.ARCHIVE_DIR = os.path.join(work_dir, 'archive')
+    metrics.SUMMARY_PATH = os.path.join(work_dir, 'run_metrics.json')
+    metrics.PROMETHEUS_PATH = os.path.join(work_dir, 'run_metrics.prom')
+    relevance.LOG_PATH = os.path.join(work_dir, 'relevance_log.jsonl')
+
+# ---------------------------------------------------------------------------
+# Updater benchmark
+# ---------------------------------------------------------------------------
+
+def bench_updater(work_dir, pages, rows_per_page, server_latency, llm_latency, llm_failure_rate, extract_workers):
+    """
+    One historic updater.run() against the fixture server and FakeLLM,
+    starting from an empty database.
+    """
+    import updater
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+    _use_paths(work_dir)
+    http_client.HOST_DELAY = 0
+    http_client._limiters.clear()
+
+    server = FixtureServer(pages=pages, rows_per_page=rows_per_page, latency=server_latency).start()
+    llm = FakeLLM(latency=llm_latency, failure_rate=llm_failure_rate)
+    extractor._client = llm
+
+    urls = {'DOJ': '/rss/DOJ', 'FATF': '/rss/FATF', 'FINTRAC': '/rss/FINTRAC', 'DHS': '/rss/DHS',
+            'OFAC': '/ofac', 'US_Treasury': '/treasury'}
+    saved_urls = {source['name']: source['url'] for source in updater.SOURCES}
+    saved_doj_url = scrapers.SPECS['DOJ'].get('url')
+    for source in updater.SOURCES:
+        source['url'] = server.url + urls[source['name']]
+    scrapers.SPECS['DOJ']['url'] = server.url + '/doj'
+
+    try:
+        start = time.perf_counter()
+        stats = updater.run(extract_workers=extract_workers, historic=True)
+        elapsed = time.perf_counter() - start
+    finally:
+        server.stop()
+        extractor._client = None
+        for source in updater.SOURCES:
+            source['url'] = saved_urls[source['name']]
+        scrapers.SPECS['DOJ']['url'] = saved_doj_url
+        database.close_db_connection()
+
+    pages_fetched = server.requests['listing'] + server.requests['rss']
+    result = {
+        'elapsed_s': round(elapsed, 3),
+        'pages': pages_fetched,
+        'detail_pages': server.requests['detail'],
+        'pages_per_s': round(pages_fetched / elapsed, 2),
+        'candidates': stats['submitted'],
+        'filtered_as_irrelevant': stats['filtered'],
+        'articles_saved': stats['saved'],
+        'articles_per_s': round(stats['saved'] / elapsed, 2),
+        'llm_calls': llm.calls,
+        'llm_failures': llm.failures,
+        'llm_calls_per_article': round(llm.calls / max(stats['extracted'], 1), 3),
+        'llm_prompt_tokens': llm.prompt_tokens,
+        'pipeline': stats,
+        'stages': metrics.summary()['sources'],
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    if llm.latencies:
+        result['llm_latency'] = percentiles(llm.latencies)
+    return result
+
+# ---------------------------------------------------------------------------
+# Synthetic datasets and read-path benchmark
+# ---------------------------------------------------------------------------
+
+ENTITIES_PER_ARTICLE = 2
+BUILD_BATCH = 500
+
+def _synthetic_name(rng, distinct):
+    # Zipf-like reuse: a few actors recur across many articles
+    n = int(distinct * rng.random() ** 3)
+    if n % 3 == 0:
+        return f"{LAST_NAMES[n % 10]} {COMPANIES[(n // 10) % 8]} {n // 80} LLC"
+    return f"{FIRST_NAMES[n % 10]} {LAST_NAMES[(n // 10) % 10]} {n // 100}"
+
+def build_dataset(path, n_entities, seed=42):
+    """
+    Writes a synthetic aml.db with `n_entities` entity mentions through
+    database.save_articles, so every index, trigger and rollup is populated
+    the way ingest would. Reused if it already exists.
+    """
+    if os.path.exists(path):
+        return False
+    tmp_path = path + '.building'
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(tmp_path + suffix):
+            os.remove(tmp_path + suffix)
+    database.close_db_connection()
+    database.DB_PATH = tmp_path
+    database.init_db()
+
+    rng = random.Random(seed)
+    sources = ['DOJ', 'OFAC', 'US_Treasury', 'DHS', 'FINTRAC']
+    n_articles = n_entities // ENTITIES_PER_ARTICLE
+    start = datetime(2026, 1, 1)
+    for first in range(0, n_articles, BUILD_BATCH):
+        batch = []
+        for k in range(first, min(first + BUILD_BATCH, n_articles)):
+            date = start - timedelta(minutes=7 * k)
+            entities = [{'name': _synthetic_name(rng, n_entities // 4), 'type': rng.choice(RISKS)}
+                        for _ in range(ENTITIES_PER_ARTICLE)]
+            batch.append({
+                'source': sources[k % len(sources)],
+                'title': f"{entities[0]['name']} charged in sanctions evasion case {k}",
+                'url': f'https://bench.invalid/{k}',
+                'date': date.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'content': f"Press release {k}. " + ' '.join(rng.choice(LAST_NAMES) for _ in range(60)),
+                'entities': entities,
+            })
+        database.save_articles(batch)
+    database.close_db_connection()
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(tmp_path + suffix):
+            os.remove(tmp_path + suffix)
+    os.replace(tmp_path, path)
+    return True
+
+def read_workload(rng):
+    """
+    (name, callable) pairs covering the backend.database read functions the
+    dashboard and screening tools use. Arguments are drawn from the dataset.
+    """
+    conn = database.get_db_connection()
+    names = [row[0] for row in conn.execute('SELECT name FROM entities ORDER BY random() LIMIT 200')]
+    entity_ids = [row[0] for row in conn.execute('SELECT id FROM canonical_entities ORDER BY random() LIMIT 200')]
+    middle = conn.execute('SELECT published_at, id FROM articles ORDER BY id LIMIT 1 OFFSET (SELECT COUNT(*) / 2 FROM articles)').fetchone()
+    entity_middle = conn.execute('SELECT a.published_at, e.id FROM entities e JOIN articles a ON a.id = e.article_id '
+                                 'WHERE e.article_id = ?', (middle[1],)).fetchone()
+    # Windows end at the newest article so they select data however old the dataset is
+    now = conn.execute('SELECT MAX(published_at) FROM articles').fetchone()[0] or int(time.time())
+    return [
+        ('get_recent_articles', lambda: database.get_recent_articles(limit=100)),
+        ('get_recent_articles_page', lambda: database.get_recent_articles(limit=100, before=tuple(middle))),
+        ('get_recent_entities', lambda: database.get_recent_entities(limit=100)),
+        ('get_recent_entities_page', lambda: database.get_recent_entities(limit=100, before=tuple(entity_middle))),
+        ('get_articles_by_source', lambda: database.get_articles_by_source(rng.choice(['DOJ', 'OFAC', 'DHS']), limit=50)),
+        ('get_articles_since', lambda: database.get_articles_since(now - 30 * 86400)),
+        ('get_entities_by_name', lambda: database.get_entities_by_name(rng.choice(names), limit=50)),
+        ('get_entities_by_type', lambda: database.get_entities_by_type(rng.choice(RISKS), limit=50)),
+        ('get_watchlist', lambda: database.get_watchlist(limit=100)),
+        ('get_entity_articles', lambda: database.get_entity_articles(rng.choice(entity_ids), limit=5)),
+        ('get_metrics_30d', lambda: database.get_metrics(since=now - 30 * 86400)),
+        ('get_daily_mentions_30d', lambda: database.get_daily_mentions(now - 30 * 86400)),
+        ('search', lambda: database.search(rng.choice(LAST_NAMES + ['sanctions', 'evasion case']), limit=50)),
+    ]
+
+def bench_queries(path, iterations, seed=7):
+    database.close_db_connection()
+    database.DB_PATH = path
+    # Datasets are reused between runs and may predate the latest migrations
+    database.migrate()
+    rng = random.Random(seed)
+    results = {}
+    for name, call in read_workload(rng):
+        call()  # warm the page cache and statement cache
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            call()
+            samples.append(time.perf_counter() - start)
+        results[name] = percentiles(samples)
+    database.close_db_connection()
+    return results
+
+def dataset_info(path):
+    conn = sqlite3.connect(path)
+    try:
+        counts = {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                  for table in ('articles', 'entities', 'canonical_entities')}
+    finally:
+        conn.close()
+    counts['file_mb'] = round(os.path.getsize(path) / (1024 * 1024), 1)
+    return counts
+
+# ---------------------------------------------------------------------------
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Offline benchmark for the updater and the aml.db read path")
+    arg_parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f"JSON results file (default: {DEFAULT_OUTPUT})")
+    arg_parser.add_argument('--sizes', default=DEFAULT_SIZES, help=f"Synthetic dataset sizes in entities (default: {DEFAULT_SIZES})")
+    arg_parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help="Where synthetic datasets are built and reused")
+    arg_parser.add_argument('--iterations', type=int, default=200, help="Calls per read function")
+    arg_parser.add_argument('--pages', type=int, default=10, help="Listing pages per scraped source")
+    arg_parser.add_argument('--rows-per-page', type=int, default=20)
+    arg_parser.add_argument('--server-latency', type=float, default=0.0, help="Seconds added to every fixture response")
+    arg_parser.add_argument('--llm-latency', type=float, default=0.05, help="Seconds per fake LLM call")
+    arg_parser.add_argument('--llm-failure-rate', type=float, default=0.0, help="Fraction of fake LLM calls that fail")
+    arg_parser.add_argument('--extract-workers', type=int, default=4)
+    arg_parser.add_argument('--skip-updater', action='store_true')
+    arg_parser.add_argument('--skip-queries', action='store_true')
+    arg_parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                            help=f"p95 budget of read functions without their own (default: {DEFAULT_BUDGET_MS}, 0 disables every budget)")
+    args = arg_parser.parse_args()
+
+    results = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'args': vars(args),
+    }
+
+    if not args.skip_updater:
+        print("=== Updater (fixture server + fake LLM) ===")
+        with tempfile.TemporaryDirectory(prefix='aml_bench_') as work_dir:
+            results['updater'] = bench_updater(
+                os.path.join(work_dir, 'run'), args.pages, args.rows_per_page, args.server_latency,
+                args.llm_latency, args.llm_failure_rate, args.extract_workers)
+        u = results['updater']
+        print(f"  {u['pages_per_s']} pages/s, {u['articles_per_s']} articles/s, "
+              f"{u['llm_calls_per_article']} LLM calls/article, peak RSS {u['peak_rss_mb']} MB")
+
+    over_budget = []
+    if not args.skip_queries:
+        os.makedirs(args.data_dir, exist_ok=True)
+        results['queries'] = {}
+        for size_text in args.sizes.split(','):
+            size = parse_size(size_text)
+            path = os.path.join(args.data_dir, f'aml_{size}.db')
+            print(f"=== Read path, {size} entities ===")
+            start = time.perf_counter()
+            if build_dataset(path, size):
+                print(f"  Built {path} in {time.perf_counter() - start:.0f}s")
+            timings = bench_queries(path, args.iterations)
+            results['queries'][str(size)] = {
+                'dataset': dataset_info(path),
+                'functions': timings,
+                'peak_rss_mb': peak_rss_mb(),
+            }
+            for name, timing in timings.items():
+                budget = BUDGETS_MS.get(name, args.budget_ms) if args.budget_ms else None
+                timing['budget_ms'] = budget
+                over = budget is not None and timing['p95_ms'] > budget
+                if over:
+                    over_budget.append(f"{name} at {size} entities: p95 {timing['p95_ms']:.1f} ms > {budget:g} ms")
+                print(f"  {name:<26} p50 {timing['p50_ms']:>8.3f} ms   p95 {timing['p95_ms']:>8.3f} ms   "
+                      f"p99 {timing['p99_ms']:>8.3f} ms" + ("   OVER BUDGET" if over else ""))
+
+    results['peak_rss_mb'] = peak_rss_mb()
+    results['over_budget'] = over_budget
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    if over_budget:
+        for line in over_budget:
+            print(f"[FAIL] {line}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
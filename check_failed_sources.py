@@ -0,0 +1,150 @@
+import hashlib
+import json
+import sys
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import updater
+from backend import database, extractor, http_client
+from benchmark import FakeLLM, _use_paths
+
+# Offline check that a source whose items fail extraction is retried: its
+# checkpoint and its stored ETags must stay where they were, so the next
+# run fetches the same items again instead of stopping at the checkpoint
+# or getting a 304.
+#
+#   python check_failed_sources.py
+#
+# A fixture server publishes an OFAC-style listing and a DHS-style feed.
+# Run 1 stores the first items, run 2 sees newer items while the LLM only
+# answers garbage, run 3 sees them again with the LLM back.
+
+ROWS = 3
+
+class Fixture:
+    """
+    Serves the listing and the feed with an ETag derived from the body, so
+    conditional GETs behave like on the real sites. publish() adds newer items.
+    """
+    def __init__(self):
+        self.published = ROWS
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                body = fixture.render(self.path)
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self._httpd.server_address[1]}'
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def publish(self, n=ROWS):
+        self.published += n
+
+    def _dates(self):
+        # Newest first, one item per day
+        return [datetime(2025, 12, 1) + timedelta(days=i) for i in reversed(range(self.published))]
+
+    def render(self, path):
+        parsed = urlparse(path)
+        if parsed.path == '/rss':
+            items = ''.join(
+                f'<item><title>Man charged with laundering {d:%Y-%m-%d}</title><link>{self.url}/dhs/{d:%Y%m%d}</link>'
+                f'<description>Wire fraud and money laundering.</description>'
+                f'<pubDate>{d:%a, %d %b %Y} 10:00:00 GMT</pubDate></item>' for d in self._dates())
+            return f'<?xml version="1.0"?><rss><channel><title>DHS</title>{items}</channel></rss>'.encode()
+        page = int(parse_qs(parsed.query).get('page', ['0'])[0])
+        rows = '' if page else ''.join(
+            f'<div class="views-row"><time datetime="{d:%Y-%m-%d}">{d:%B %d, %Y}</time>'
+            f'<a href="/ofac/{d:%Y%m%d}">Russia-related Designations {d:%Y-%m-%d}</a></div>' for d in self._dates())
+        return f'<html><body>{rows}</body></html>'.encode()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+class GarbledLLM:
+    """
+    An LLM that answers every request with text that is not JSON.
+    """
+    def __init__(self):
+        self.models = self
+
+    def generate_content(self, model, contents, **kwargs):
+        return type('Response', (), {'text': 'Sorry, I cannot help with that.'})()
+
+def snapshot():
+    conn = database.get_db_connection()
+    articles = conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+    # Only paginated listings keep a checkpoint; feeds rely on their validators
+    checkpoint = database.get_checkpoint('OFAC')
+    checkpoints = {'OFAC': checkpoint['last_url'] if checkpoint else None}
+    try:
+        with open(http_client.VALIDATORS_PATH, 'r') as f:
+            validators = json.load(f)
+    except OSError:
+        validators = {}
+    return articles, checkpoints, validators
+
+def check(work_dir):
+    _use_paths(work_dir)
+    http_client.HOST_DELAY = 0
+    http_client.ARCHIVE = False
+    http_client._limiters.clear()
+    fixture = Fixture()
+    saved_sources = list(updater.SOURCES)
+    updater.SOURCES[:] = [{'name': 'DHS', 'type': 'rss', 'url': fixture.url + '/rss'},
+                          {'name': 'OFAC', 'type': 'scrape', 'url': fixture.url + '/ofac'}]
+    failures = []
+    try:
+        extractor._client = FakeLLM(latency=0)
+        updater.run(concurrent=False)
+        articles, checkpoints, validators = snapshot()
+        if articles != 2 * ROWS or not all(checkpoints.values()) or len(validators) != 2:
+            failures.append(f"run 1 stored {articles} articles, checkpoints {checkpoints}, {len(validators)} validators")
+
+        fixture.publish()
+        extractor._client = GarbledLLM()
+        updater.run(concurrent=False)
+        after = snapshot()
+        if after != (articles, checkpoints, validators):
+            failures.append(f"a run whose extractions all failed changed the state: {after[0]} articles, "
+                            f"checkpoints {after[1]}, validators changed: {after[2] != validators}")
+
+        extractor._client = FakeLLM(latency=0)
+        updater.run(concurrent=False)
+        articles, _, _ = snapshot()
+        if articles != 4 * ROWS:
+            failures.append(f"the run after the failed one stored {articles} articles in total, expected {4 * ROWS}")
+    finally:
+        extractor._client = None
+        updater.SOURCES[:] = saved_sources
+        database.close_db_connection()
+        fixture.stop()
+    return failures
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory(prefix='aml_check_') as tmp:
+        failures = check(tmp)
+    if failures:
+        print("\nFailed sources were not retried:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nFailed sources keep their checkpoints and validators.")
@@ -0,0 +1,47 @@
+import os
+import sys
+import tempfile
+
+from backend import database
+
+def is_full_scan(detail):
+    # "SCAN a USING INDEX ..." walks an index in order (fine with LIMIT);
+    # a bare "SCAN a" reads the table itself. A SELECT of scalar subqueries
+    # "scans" its single constant row.
+    return detail.startswith('SCAN') and 'USING' not in detail and detail != 'SCAN CONSTANT ROW'
+
+def is_unbounded_sort(details):
+    # Sorting the handful of rows an index SEARCH found is cheap;
+    # sorting without any SEARCH means sorting the whole table.
+    sorts = any(d.startswith('USE TEMP B-TREE') for d in details)
+    return sorts and not any(d.startswith('SEARCH') for d in details)
+
+def check_plans(conn):
+    failures = []
+    for name, (sql, params) in database.HOT_QUERIES.items():
+        plan = conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+        details = [row[3] for row in plan]
+        print(f"--- {name} ---")
+        for detail in details:
+            print(f"  {detail}")
+        bad = [d for d in details if is_full_scan(d)]
+        if is_unbounded_sort(details):
+            bad += [d for d in details if d.startswith('USE TEMP B-TREE')]
+        if bad:
+            failures.append((name, bad))
+    return failures
+
+if __name__ == "__main__":
+    # Check a fresh database built by the migration runner, not the live aml.db
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, 'plans.db')
+        database.init_db()
+        failures = check_plans(database.get_db_connection())
+        database.close_db_connection()
+
+    if failures:
+        print("\nFull table scans / temp sorts found:")
+        for name, bad in failures:
+            print(f"  {name}: {'; '.join(bad)}")
+        sys.exit(1)
+    print("\nAll hot queries use indexes.")
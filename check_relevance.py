@@ -0,0 +1,217 @@
+import json
+import os
+import sqlite3
+import sys
+from collections import Counter
+
+from backend import database
+from backend import relevance
+
+# Thresholds compared in the recall table
+THRESHOLDS = (0.5, 1.0, 1.5, 2.0, 3.0, 4.0)
+
+# Hand-labelled listing items from the filtered sources, in the form the
+# scrapers produce them: (source, title, text, relevant). The stored
+# articles alone can't measure the filter, since they only show what was
+# kept and may all come from always-relevant sources. Every item here must
+# be decided right at the current settings.
+SAMPLE = [
+    ('DOJ', 'Florida Man Sentenced to 10 Years for Laundering Drug Proceeds Through Shell Companies',
+     'The defendant moved more than $4 million in narcotics proceeds through front companies.', True),
+    ('DOJ', 'Two Executives Plead Guilty in Foreign Bribery Scheme',
+     'The executives admitted paying kickbacks to officials to win government contracts, in violation of the FCPA.', True),
+    ('DOJ', 'Operator of Unlicensed Money Transmitting Business Charged',
+     'The indictment alleges the hawala network moved funds for customers overseas without registering with FinCEN.', True),
+    ('DOJ', 'Bank Agrees to Pay $140 Million to Resolve Bank Secrecy Act Violations',
+     'The bank failed to maintain an effective anti-money laundering program.', True),
+    ('DOJ', 'Investment Adviser Indicted for Running $30 Million Ponzi Scheme', '', True),
+    ('DOJ', 'Company Charged with Exporting Controlled Technology to Iran',
+     'Prosecutors say the company used intermediaries to evade sanctions and export controls.', True),
+    ('DOJ', 'Former Official Convicted of Embezzling Public Funds', '', True),
+    ('DOJ', 'Defendants Charged in Health Care Fraud Scheme Targeting Medicare', '', True),
+    ('DOJ', 'Man Pleads Guilty to Providing Material Support to Foreign Terrorist Organization',
+     'He sent cryptocurrency to accounts controlled by the group.', True),
+    ('DOJ', 'Tax Preparer Sentenced for Filing False Tax Returns for Clients', '', True),
+    ('DOJ', 'Justice Department Reaches Settlement with City to Resolve Voting Rights Act Lawsuit', '', False),
+    ('DOJ', 'Attorney General Announces Appointment of New U.S. Attorney', '', False),
+    ('DOJ', 'Man Sentenced for Hate Crime Assault at Place of Worship', '', False),
+    ('DOJ', 'Justice Department Secures Agreement with Hospital Under the Americans with Disabilities Act', '', False),
+    ('DOJ', 'Justice Department Launches Community Outreach Program on Elder Safety', '', False),
+    ('DHS', 'HSI Investigation Leads to Seizure of $2 Million in Cartel Drug Proceeds',
+     'Agents traced the funds through a trade-based money laundering scheme.', True),
+    ('DHS', 'Cybercrime Ring Behind Ransomware Attacks Dismantled',
+     'Investigators seized virtual currency wallets holding the proceeds.', True),
+    ('DHS', 'Smuggling Network Moving Sanctioned Oil Disrupted', '', True),
+    ('DHS', 'FEMA Approves Disaster Assistance for Hurricane Survivors', '', False),
+    ('DHS', 'Secretary Announces New TSA Screening Technology at Airports', '', False),
+    ('DHS', 'Coast Guard Rescues Four Boaters Off the Coast', '', False),
+    ('DHS', 'DHS Hosts Roundtable on Wildfire Preparedness', '', False),
+    ('US_Treasury', 'Treasury Sanctions Network Financing Weapons Procurement',
+     'The designated individuals and entities are added to the SDN List.', True),
+    ('US_Treasury', 'FinCEN Assesses Civil Money Penalty Against Casino for Anti-Money Laundering Failures', '', True),
+    ('US_Treasury', 'Treasury Designates Facilitators of Sanctions Evasion', '', True),
+    ('US_Treasury', 'Treasury Issues Advisory on Fraud Schemes Targeting Financial Institutions', '', True),
+    ('US_Treasury', 'Secretary Delivers Remarks on the Economic Outlook', '', False),
+    ('US_Treasury', 'Treasury Announces Results of Quarterly Refunding', '', False),
+    ('US_Treasury', 'Treasury Releases Monthly Statement of the Public Debt', '', False),
+    ('US_Treasury', 'Deputy Secretary Travels to Tokyo for Bilateral Meetings', '', False),
+]
+
+# Titles published by the sources, labelled before they were scored and
+# never used to tune TERMS, so they measure the filter instead of
+# confirming it. Title only, the least the scrapers can give. Known misses
+# at the current settings: FATF publications carry no enforcement
+# vocabulary and a plea headline without the offence says too little.
+HELD_OUT = [
+    ('DOJ', 'Binance and CEO Plead Guilty to Federal Charges in $4B Resolution', '', True),
+    ('DOJ', 'TD Bank Pleads Guilty to Bank Secrecy Act and Money Laundering Conspiracy Violations in $1.8B Resolution', '', True),
+    ('DOJ', 'Samuel Bankman-Fried Sentenced to 25 Years for His Orchestration of Multiple Fraudulent Schemes', '', True),
+    ('DOJ', 'Raytheon Company to Pay Over $950M in Connection with Defective Pricing, Foreign Bribery, and Export Control Schemes', '', True),
+    ('DOJ', 'National Health Care Fraud Takedown Results in 193 Defendants Charged and Over $2.75 Billion in False Billings', '', True),
+    ('DOJ', 'Glencore Entered Guilty Pleas to Foreign Bribery and Market Manipulation Schemes', '', True),
+    ('DOJ', 'Sinaloa Cartel Leaders Ismael "El Mayo" Zambada and Joaquín Guzmán López Arrested in El Paso, Texas', '', True),
+    ('DOJ', 'Justice Department Announces Seizure of Over $112M in Funds Linked to Cryptocurrency Investment Scams', '', True),
+    ('DOJ', 'Department of Justice Seizes $2.3 Million in Cryptocurrency Paid to the Ransomware Extortionists Darkside', '', True),
+    ('DOJ', 'Justice Department Sues Apple for Monopolizing Smartphone Markets', '', False),
+    ('DOJ', 'Justice Department Finds Conditions at Georgia Prisons Violate the Constitution', '', False),
+    ('DOJ', 'Man Sentenced to Life in Prison for Murder of Federal Officer', '', False),
+    ('DOJ', 'Two Men Charged with Arson at Federal Courthouse', '', False),
+    ('DHS', 'HSI Investigation Leads to Guilty Plea in Money Laundering Scheme', '', True),
+    ('DHS', 'DHS Announces Extension and Redesignation of Haiti for Temporary Protected Status', '', False),
+    ('DHS', 'FEMA Approves Major Disaster Declaration for Kentucky', '', False),
+    ('DHS', 'Man Charged with Threatening Election Officials', '', False),
+    ('US_Treasury', 'Treasury Sanctions Mexico-Based Sinaloa Cartel Money Launderers', '', True),
+    ('US_Treasury', 'Treasury Targets Sanctions Evasion Networks and Russian Technology Suppliers', '', True),
+    ('US_Treasury', 'FinCEN Issues Final Rules to Safeguard Residential Real Estate, Investment Adviser Sectors from Illicit Finance', '', True),
+    ('US_Treasury', 'Treasury Announces Marketable Borrowing Estimates', '', False),
+    ('US_Treasury', "Readout of Secretary Yellen's Meeting with Governor of the People's Bank of China", '', False),
+    ('FATF', 'Jurisdictions under Increased Monitoring - October 2024', '', True),
+    ('FATF', 'Outcomes FATF Plenary, October 2024', '', True),
+    ('OFAC', 'Issuance of Russia-related General License; Publication of Russia-related Frequently Asked Question', '', True),
+    ('OFAC', 'Sudan-related Designations; Russia-related Designations Removals', '', True),
+    ('FINTRAC', "Ministerial directive on financial transactions associated with the Democratic People's Republic of Korea", '', True),
+]
+
+# Recall and precision HELD_OUT must keep at the current THRESHOLD. They
+# are what the current settings reach; raise them as the terms improve.
+HELD_OUT_MIN_RECALL = 0.8
+HELD_OUT_MIN_PRECISION = 1.0
+
+def check_recall(db_path=database.DB_PATH):
+    """
+    Scores every stored article. They were all saved because the LLM found
+    entities in them, so any that would now be filtered is lost recall.
+    Returns the articles below the current THRESHOLD.
+    """
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    rows = conn.execute('SELECT source, title, content FROM articles').fetchall()
+    conn.close()
+
+    scored = []
+    for source, title, content in rows:
+        if source in relevance.ALWAYS_RELEVANT:
+            continue
+        value, terms = relevance.score(title, f"{title}. {content or ''}")
+        scored.append((value, source, title, terms))
+
+    print(f"--- Recall on {len(scored)} stored articles "
+          f"({len(rows) - len(scored)} from always-relevant sources not scored) ---")
+    for threshold in THRESHOLDS:
+        kept = sum(value >= threshold for value, *_ in scored)
+        marker = '  <- current' if threshold == relevance.THRESHOLD else ''
+        print(f"  threshold {threshold:>4}: {kept}/{len(scored)} kept{marker}")
+
+    missed = sorted(s for s in scored if s[0] < relevance.THRESHOLD)
+    if missed:
+        print(f"\nWould be filtered at {relevance.THRESHOLD}:")
+        for value, source, title, terms in missed:
+            print(f"  {value:>5} {source}: {title[:80]} {terms[:3]}")
+    return missed
+
+def _decide(sample, threshold):
+    # relevance.check, so ALWAYS_RELEVANT applies as in the updater, without
+    # writing these decisions to its log
+    saved, relevance.LOG_PATH = relevance.LOG_PATH, os.devnull
+    try:
+        return [relevance.check({'source': source, 'title': title, 'text': text, 'url': ''}, threshold)
+                for source, title, text, _ in sample]
+    finally:
+        relevance.LOG_PATH = saved
+
+def _recall_precision(kept, labels):
+    positives = sum(labels)
+    true_positives = sum(k and relevant for k, relevant in zip(kept, labels))
+    recall = true_positives / positives if positives else 1.0
+    precision = true_positives / sum(kept) if any(kept) else 1.0
+    return recall, precision
+
+def check_sample(sample=SAMPLE, name='Labelled sample', min_recall=1.0, min_precision=1.0):
+    """
+    Runs the updater's relevance check on a labelled sample at each of
+    THRESHOLDS. Returns the failures at the current THRESHOLD: recall or
+    precision below min_recall / min_precision.
+    """
+    labels = [relevant for *_, relevant in sample]
+    positives = sum(labels)
+
+    print(f"--- {name}: {positives} relevant, {len(sample) - positives} not ---")
+    for threshold in THRESHOLDS:
+        kept = [decision[0] for decision in _decide(sample, threshold)]
+        recall, precision = _recall_precision(kept, labels)
+        marker = '  <- current' if threshold == relevance.THRESHOLD else ''
+        print(f"  threshold {threshold:>4}: recall {recall:.2f}, precision {precision:.2f}{marker}")
+
+    decisions = _decide(sample, relevance.THRESHOLD)
+    kept = [decision[0] for decision in decisions]
+    missed, wrong = [], []
+    for (source, title, _, relevant), (keep, value, terms) in zip(sample, decisions):
+        if relevant != keep:
+            (missed if relevant else wrong).append((value, source, title, terms))
+    for label, items in (('Relevant but filtered', missed), ('Irrelevant but kept', wrong)):
+        if items:
+            print(f"\n{label} at {relevance.THRESHOLD}:")
+            # No score for items of ALWAYS_RELEVANT sources
+            for value, source, title, terms in sorted(items, key=lambda item: (item[0] is None, item[0] or 0)):
+                print(f"  {'-' if value is None else value:>5} {source}: {title[:80]} {terms[:3]}")
+    print()
+
+    failures = []
+    recall, precision = _recall_precision(kept, labels)
+    if recall < min_recall:
+        failures.append(f"{name}: recall {recall:.2f} below {min_recall}")
+    if precision < min_precision:
+        failures.append(f"{name}: precision {precision:.2f} below {min_precision}")
+    return failures
+
+def summarize_log(path=relevance.LOG_PATH):
+    """
+    Counts the decisions logged by the updater, per source, including the
+    rotated log.
+    """
+    decisions = Counter()
+    # The rotated log first, if there is one
+    paths = [p for p in (path + '.1', path) if os.path.exists(p)]
+    if not paths:
+        print(f"\nNo decision log at {path}")
+        return decisions
+    for log_path in paths:
+        with open(log_path, 'r') as f:
+            for line in f:
+                entry = json.loads(line)
+                decisions[(entry['source'], entry['relevant'])] += 1
+
+    print(f"\n--- Logged decisions ({path}) ---")
+    for source in sorted({source for source, _ in decisions}):
+        kept, dropped = decisions[(source, True)], decisions[(source, False)]
+        print(f"  {source}: {kept} sent to the LLM, {dropped} filtered")
+    return decisions
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else database.DB_PATH
+    failures = check_sample() + check_sample(HELD_OUT, 'Held-out titles',
+                                             HELD_OUT_MIN_RECALL, HELD_OUT_MIN_PRECISION)
+    missed = check_recall(db_path)
+    summarize_log()
+    for failure in failures:
+        print(f"[FAIL] {failure}")
+    sys.exit(1 if failures or missed else 0)
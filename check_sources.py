@@ -1,12 +1,19 @@
 import pandas as pd
 import sqlite3
 import os
+import json
 
 try:
-    # Check CSV first if it exists (Demo Mode)
-    if os.path.exists('demo_articles.csv'):
-        print("Reading from CSV...")
-        df = pd.read_csv('demo_articles.csv')
+    # Check the demo snapshot first if it exists (Demo Mode)
+    if os.path.exists(os.path.join('demo_snapshot', 'manifest.json')):
+        print("Reading from demo snapshot...")
+        import pyarrow.parquet as pq
+        with open(os.path.join('demo_snapshot', 'manifest.json')) as f:
+            parts = json.load(f)['parts']['articles']
+        df = pd.concat([
+            pq.read_table(os.path.join('demo_snapshot', name), columns=['source', 'date', 'title']).to_pandas()
+            for name in parts
+        ])
     else:
         # Fallback to DB
         print("Reading from DB...")
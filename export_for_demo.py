@@ -1,33 +1,220 @@
 import sqlite3
-import pandas as pd
+import json
 import os
+import sys
+import time
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
 
 # Ensure backend exists or path is correct
 DB_PATH = r'c:\Users\phume\Downloads\agent_S21\aml-agent\backend\aml.db'
 
-def export_data():
-    conn = sqlite3.connect(DB_PATH)
-    
-    # Export Entities (Joined with metadata for the dashboard)
-    print("Exporting Entities...")
-    query_entities = """
-        SELECT e.name, e.type, a.source, a.date, a.title, a.url 
-        FROM entities e 
-        JOIN articles a ON e.article_id = a.id 
-        ORDER BY a.date DESC
+# Snapshot read by app_demo.py:
+#   manifest.json          what has been exported so far (see export_data)
+#   articles/part-N.parquet  light article index (no content)
+#   entities/part-N.parquet  entity mentions joined with article metadata
+#   content/part-N.arrow     article bodies, Arrow IPC so the demo can memory-map them
+#   rollups.parquet        hourly metric rollups, rewritten every time (small)
+SNAPSHOT_DIR = 'demo_snapshot'
+MANIFEST_NAME = 'manifest.json'
+FORMAT_VERSION = 1
+
+# Incremental runs add one part per table; past this many they are merged
+MAX_PARTS = 16
+
+ARTICLE_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('source', pa.string()),
+    ('title', pa.string()),
+    ('url', pa.string()),
+    ('date', pa.string()),
+    ('published_at', pa.int64()),
+])
+ENTITY_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('article_id', pa.int64()),
+    ('name', pa.string()),
+    ('type', pa.string()),
+    ('source', pa.string()),
+    ('date', pa.string()),
+    ('title', pa.string()),
+    ('url', pa.string()),
+    ('published_at', pa.int64()),
+])
+CONTENT_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('content', pa.string()),
+])
+ROLLUP_SCHEMA = pa.schema([
+    ('kind', pa.string()),
+    ('hour', pa.int64()),
+    ('source', pa.string()),
+    ('risk_level', pa.string()),
+    ('count', pa.int64()),
+])
+
+ARTICLES_SQL = '''
+    SELECT id, source, title, url, date, published_at, content
+    FROM articles WHERE id > ? ORDER BY id
+'''
+ENTITIES_SQL = '''
+    SELECT e.id, e.article_id, e.name, e.type, a.source, a.date, a.title, a.url, a.published_at
+    FROM entities e
+    JOIN articles a ON e.article_id = a.id
+    WHERE e.id > ? ORDER BY e.id
+'''
+ROLLUPS_SQL = '''
+    SELECT 'articles' AS kind, hour, source, NULL AS risk_level, articles AS count FROM rollup_articles WHERE articles > 0
+    UNION ALL
+    SELECT 'mentions', hour, source, risk_level, mentions FROM rollup_mentions WHERE mentions > 0
+    UNION ALL
+    SELECT 'new_entities', hour, NULL, risk_level, entities FROM rollup_new_entities WHERE entities > 0
+'''
+
+def _table(rows, schema):
+    columns = list(zip(*rows)) if rows else [[] for _ in schema]
+    return pa.Table.from_arrays([pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema)
+
+def _write_parquet(table, path):
+    tmp_path = path + '.tmp'
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, path)
+
+def _write_arrow(table, path):
+    # Uncompressed IPC file: readers memory-map it and only touch the rows they show
+    tmp_path = path + '.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+
+def _read_part(path):
+    if path.endswith('.arrow'):
+        return ipc.open_file(pa.memory_map(path)).read_all()
+    return pq.read_table(path, memory_map=True)
+
+def load_manifest(snapshot_dir=SNAPSHOT_DIR):
+    try:
+        with open(os.path.join(snapshot_dir, MANIFEST_NAME), 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('format') == FORMAT_VERSION else None
+
+def save_manifest(manifest, snapshot_dir=SNAPSHOT_DIR):
+    path = os.path.join(snapshot_dir, MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+def _empty_manifest():
+    return {
+        'format': FORMAT_VERSION,
+        'last_article_id': 0,
+        'last_entity_id': 0,
+        'rows': {'articles': 0, 'entities': 0},
+        'parts': {'articles': [], 'entities': [], 'content': []},
+        'next_part': 0,
+    }
+
+def _is_stale(conn, manifest):
+    # Rows deleted since the last snapshot (reset_recent.py, wipe_db.py) can't be
+    # expressed as an append, so the snapshot is rebuilt from scratch.
+    articles = conn.execute('SELECT COUNT(*) FROM articles WHERE id <= ?', (manifest['last_article_id'],)).fetchone()[0]
+    entities = conn.execute(
+        'SELECT COUNT(*) FROM entities e JOIN articles a ON e.article_id = a.id WHERE e.id <= ?',
+        (manifest['last_entity_id'],)
+    ).fetchone()[0]
+    return articles != manifest['rows']['articles'] or entities != manifest['rows']['entities']
+
+def _compact(manifest, snapshot_dir):
+    """
+    Merges every table's parts into one once there are too many, so the demo's
+    cold start doesn't grow with the number of exports.
+    """
+    for kind, parts in manifest['parts'].items():
+        if len(parts) <= MAX_PARTS:
+            continue
+        merged = pa.concat_tables([_read_part(os.path.join(snapshot_dir, p)) for p in parts])
+        ext = os.path.splitext(parts[0])[1]
+        name = f"{kind}/part-{manifest['next_part']:05d}{ext}"
+        path = os.path.join(snapshot_dir, name)
+        (_write_arrow if ext == '.arrow' else _write_parquet)(merged, path)
+        manifest['parts'][kind] = [name]
+        manifest['compacted'] = manifest.get('compacted', []) + parts
+        manifest['next_part'] += 1
+        print(f"Compacted {len(parts)} {kind} parts into {name}")
+
+def export_data(db_path=DB_PATH, snapshot_dir=SNAPSHOT_DIR, full=False):
+    """
+    Appends rows added since the last snapshot (by article/entity id) as new
+    parts, refreshes the rollups and updates the manifest last, so a reader
+    never sees a manifest pointing at a part that isn't written yet.
     """
-    df_entities = pd.read_sql_query(query_entities, conn)
-    df_entities.to_csv('demo_entities.csv', index=False)
-    print(f"Saved demo_entities.csv ({len(df_entities)} rows)")
+    start = time.monotonic()
+    conn = sqlite3.connect(db_path)
+    for kind in ('articles', 'entities', 'content'):
+        os.makedirs(os.path.join(snapshot_dir, kind), exist_ok=True)
+
+    manifest = None if full else load_manifest(snapshot_dir)
+    if manifest and _is_stale(conn, manifest):
+        print("Rows were deleted since the last snapshot. Rebuilding.")
+        manifest = None
+    if manifest is None:
+        old = load_manifest(snapshot_dir)
+        manifest = _empty_manifest()
+        if old:
+            manifest['next_part'] = old['next_part']
+            manifest['compacted'] = sum(old['parts'].values(), []) + old.get('compacted', [])
+
+    part = manifest['next_part']
 
-    # Export Articles
     print("Exporting Articles...")
-    query_articles = "SELECT * FROM articles ORDER BY date DESC"
-    df_articles = pd.read_sql_query(query_articles, conn)
-    df_articles.to_csv('demo_articles.csv', index=False)
-    print(f"Saved demo_articles.csv ({len(df_articles)} rows)")
-    
+    rows = conn.execute(ARTICLES_SQL, (manifest['last_article_id'],)).fetchall()
+    if rows:
+        _write_parquet(_table([r[:6] for r in rows], ARTICLE_SCHEMA),
+                       os.path.join(snapshot_dir, f'articles/part-{part:05d}.parquet'))
+        _write_arrow(_table([(r[0], r[6]) for r in rows], CONTENT_SCHEMA),
+                     os.path.join(snapshot_dir, f'content/part-{part:05d}.arrow'))
+        manifest['parts']['articles'].append(f'articles/part-{part:05d}.parquet')
+        manifest['parts']['content'].append(f'content/part-{part:05d}.arrow')
+        manifest['last_article_id'] = rows[-1][0]
+        manifest['rows']['articles'] += len(rows)
+    print(f"  {len(rows)} new articles ({manifest['rows']['articles']} total)")
+
+    print("Exporting Entities...")
+    rows = conn.execute(ENTITIES_SQL, (manifest['last_entity_id'],)).fetchall()
+    if rows:
+        _write_parquet(_table(rows, ENTITY_SCHEMA), os.path.join(snapshot_dir, f'entities/part-{part:05d}.parquet'))
+        manifest['parts']['entities'].append(f'entities/part-{part:05d}.parquet')
+        manifest['last_entity_id'] = rows[-1][0]
+        manifest['rows']['entities'] += len(rows)
+    print(f"  {len(rows)} new entities ({manifest['rows']['entities']} total)")
+
+    # Export the hourly rollups the demo metrics are computed from
+    # (tables created by backend.database.init_db)
+    print("Exporting Rollups...")
+    rows = conn.execute(ROLLUPS_SQL).fetchall()
+    _write_parquet(_table(rows, ROLLUP_SCHEMA), os.path.join(snapshot_dir, 'rollups.parquet'))
+    print(f"  {len(rows)} rollup rows")
     conn.close()
 
+    manifest['next_part'] = part + 1
+    _compact(manifest, snapshot_dir)
+    manifest['exported_at'] = int(time.time())
+    obsolete = manifest.pop('compacted', [])
+    save_manifest(manifest, snapshot_dir)
+
+    # Parts no longer referenced are removed only after the new manifest is in place
+    for name in obsolete:
+        try:
+            os.remove(os.path.join(snapshot_dir, name))
+        except OSError:
+            pass
+    print(f"Snapshot written to {snapshot_dir} in {time.monotonic() - start:.1f}s")
+    return manifest
+
 if __name__ == "__main__":
-    export_data()
+    export_data(full='--full' in sys.argv)
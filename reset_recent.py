@@ -3,6 +3,9 @@ import os
 
 DB_PATH = r'c:\Users\phume\Downloads\agent_S21\aml-agent\backend\aml.db'
 
+# ETag/Last-Modified per URL kept by backend/http_client.py next to the db
+VALIDATORS_PATH = os.path.join(os.path.dirname(DB_PATH), 'http_validators.json')
+
 def reset_recent():
     if not os.path.exists(DB_PATH):
         print("DB not found.")
@@ -12,7 +15,7 @@ def reset_recent():
     c = conn.cursor()
     
     # Get last 20 article IDs
-    c.execute('SELECT id FROM articles ORDER BY created_at DESC LIMIT 20')
+    c.execute('SELECT id, source FROM articles ORDER BY created_at DESC LIMIT 20')
     rows = c.fetchall()
     
     if not rows:
@@ -21,6 +24,7 @@ def reset_recent():
 
     ids = [str(r[0]) for r in rows]
     id_str = ",".join(ids)
+    sources = sorted({r[1] for r in rows})
     
     print(f"Deleting articles: {id_str}")
     
@@ -28,10 +32,17 @@ def reset_recent():
     c.execute(f'DELETE FROM entities WHERE article_id IN ({id_str})')
     # Delete articles
     c.execute(f'DELETE FROM articles WHERE id IN ({id_str})')
+
+    # Otherwise the next incremental run stops at the checkpoint (or gets a
+    # 304) before it reaches the deleted articles
+    c.executemany('DELETE FROM source_checkpoints WHERE source = ?', [(s,) for s in sources])
     
     conn.commit()
     conn.close()
-    print("Deleted recent entries. Run fetcher to re-process with LLM.")
+    if os.path.exists(VALIDATORS_PATH):
+        os.remove(VALIDATORS_PATH)
+    print(f"Deleted recent entries and reset the checkpoints of {', '.join(sources)}. "
+          "Run the updater to re-process them with the LLM.")
 
 if __name__ == "__main__":
     reset_recent()
@@ -0,0 +1,165 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from backend import database
+from backend import screening
+
+OUTPUT_COLUMNS = ['row', 'customer_id', 'customer_name', 'match_name', 'score', 'risk', 'entity_id', 'mentions']
+
+# Chunks in flight per worker; bounds memory no matter how large the input is
+CHUNKS_PER_WORKER = 2
+
+# Built once in the parent. Forked workers inherit it; otherwise the pool
+# initializer hands each worker one copy (never one per task).
+_INDEX = None
+
+def _init_worker(index):
+    global _INDEX
+    if index is not None:
+        _INDEX = index
+
+def screen_chunk(rows, k, min_score):
+    """
+    Screens (row number, customer id, name) tuples; returns output rows.
+    """
+    out = []
+    for row_no, customer_id, name in rows:
+        for hit in _INDEX.query(name, k=k, min_score=min_score):
+            out.append([
+                row_no, customer_id, name, hit['name'], hit['score'],
+                '; '.join(hit['types']), hit['entity_id'], hit['mentions']
+            ])
+    return len(rows), out
+
+def read_chunks(path, name_column, id_column, chunk_size, skip_rows):
+    """
+    Streams the input CSV as lists of (row number, id, name), starting after
+    `skip_rows` data rows. Only one chunk is materialized at a time.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        if name_column not in (reader.fieldnames or []):
+            raise SystemExit(f"Column '{name_column}' not found in {path} (columns: {reader.fieldnames})")
+        numbered = enumerate(reader, start=1)
+        for _ in islice(numbered, skip_rows):
+            pass
+        while True:
+            chunk = [
+                (row_no, row.get(id_column, '') if id_column else row_no, row[name_column] or '')
+                for row_no, row in islice(numbered, chunk_size)
+            ]
+            if not chunk:
+                return
+            yield chunk
+
+def load_progress(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_progress(path, progress):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(progress, f)
+    os.replace(tmp_path, path)
+
+def run(input_path, output_path, name_column='name', id_column=None, chunk_size=1000,
+        workers=None, k=3, min_score=0.85, resume=False):
+    global _INDEX
+    progress_path = output_path + '.progress.json'
+    progress = load_progress(progress_path) if resume else None
+    if progress and progress.get('input') != os.path.abspath(input_path):
+        raise SystemExit(f"{progress_path} belongs to a different input ({progress.get('input')}).")
+    if not progress:
+        progress = {'input': os.path.abspath(input_path), 'rows_done': 0, 'matches': 0, 'output_bytes': 0}
+
+    print("Building watchlist index...")
+    start = time.monotonic()
+    _INDEX = screening.ScreeningIndex.from_db()
+    database.close_db_connection()
+    print(f"  {len(_INDEX)} distinct names indexed in {time.monotonic() - start:.1f}s")
+
+    workers = workers or os.cpu_count() or 1
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context, initargs = multiprocessing.get_context('fork'), (None,)
+    else:
+        context, initargs = multiprocessing.get_context(), (_INDEX,)
+
+    # Resume: drop anything written after the last recorded checkpoint
+    if progress['rows_done']:
+        print(f"Resuming after row {progress['rows_done']} ({progress['matches']} matches so far)")
+        out = open(output_path, 'r+', newline='', encoding='utf-8')
+        out.truncate(progress['output_bytes'])
+        out.seek(progress['output_bytes'])
+    else:
+        out = open(output_path, 'w', newline='', encoding='utf-8')
+        csv.writer(out).writerow(OUTPUT_COLUMNS)
+    writer = csv.writer(out)
+
+    chunks = read_chunks(input_path, name_column, id_column, chunk_size, progress['rows_done'])
+    pending = deque()
+    run_rows = 0
+    start = time.monotonic()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker, initargs=initargs) as pool:
+            for chunk in chunks:
+                pending.append(pool.submit(screen_chunk, chunk, k, min_score))
+                # Results are written in input order, so rows_done is always a clean prefix
+                while len(pending) >= workers * CHUNKS_PER_WORKER:
+                    run_rows += _write_result(pending.popleft(), writer, out, progress, progress_path)
+                    _print_progress(progress, run_rows, start)
+            while pending:
+                run_rows += _write_result(pending.popleft(), writer, out, progress, progress_path)
+                _print_progress(progress, run_rows, start)
+    finally:
+        out.close()
+
+    print(f"Done. {progress['rows_done']} rows screened, {progress['matches']} matches written to {output_path}")
+    return progress
+
+def _write_result(future, writer, out, progress, progress_path):
+    n_rows, rows = future.result()
+    writer.writerows(rows)
+    out.flush()
+    progress['rows_done'] += n_rows
+    progress['matches'] += len(rows)
+    progress['output_bytes'] = out.tell()
+    save_progress(progress_path, progress)
+    return n_rows
+
+def _print_progress(progress, run_rows, start):
+    elapsed = max(time.monotonic() - start, 1e-9)
+    print(f"  {progress['rows_done']} rows screened, {progress['matches']} matches "
+          f"({run_rows / elapsed:.0f} rows/s)")
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Screen a customer CSV against the aml.db watchlist")
+    arg_parser.add_argument('input', help="Customer CSV")
+    arg_parser.add_argument('output', help="Matches CSV (written incrementally)")
+    arg_parser.add_argument('--name-column', default='name')
+    arg_parser.add_argument('--id-column', default=None, help="Customer id column (default: row number)")
+    arg_parser.add_argument('--chunk-size', type=int, default=1000)
+    arg_parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    arg_parser.add_argument('--top-k', type=int, default=3, help="Max matches per customer")
+    arg_parser.add_argument('--min-score', type=float, default=0.85)
+    arg_parser.add_argument('--resume', action='store_true', help="Continue an interrupted run")
+    arg_parser.add_argument('--db', default=None, help="Path to aml.db (default: backend/aml.db)")
+    args = arg_parser.parse_args()
+    if args.db:
+        database.DB_PATH = args.db
+    run(args.input, args.output, name_column=args.name_column, id_column=args.id_column,
+        chunk_size=args.chunk_size, workers=args.workers, k=args.top_k,
+        min_score=args.min_score, resume=args.resume)
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,9 @@ import os
 
 DB_PATH = r'c:\Users\phume\Downloads\agent_S21\aml-agent\backend\aml.db'
 
+# ETag/Last-Modified per URL kept by backend/http_client.py next to the db
+VALIDATORS_PATH = os.path.join(os.path.dirname(DB_PATH), 'http_validators.json')
+
 def wipe_db():
     if not os.path.exists(DB_PATH):
         print("DB not found.")
@@ -14,9 +17,14 @@ def wipe_db():
     print("Wiping all data...")
     c.execute('DELETE FROM entities')
     c.execute('DELETE FROM articles')
+    # So the next run fetches everything again instead of stopping at the
+    # checkpoints or getting 304s
+    c.execute('DELETE FROM source_checkpoints')
     
     conn.commit()
     conn.close()
+    if os.path.exists(VALIDATORS_PATH):
+        os.remove(VALIDATORS_PATH)
     print("Database wiped clean.")
 
 if __name__ == "__main__":